@@ -6,6 +6,16 @@ import subprocess
 import argparse
 import time
 import pickle
+import re
+import hashlib
+import threading
+import random
+import platform
+import tempfile
+import struct
+import zlib
+import lzma
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
 # --- AUTO-INSTALAÇÃO DE DEPENDÊNCIAS ---
@@ -53,7 +63,9 @@ try:
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
     from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-    import io
+    from googleapiclient.errors import HttpError
+    from google_auth_httplib2 import AuthorizedHttp
+    import httplib2
     import os
     from pathlib import Path
     
@@ -81,7 +93,9 @@ except ImportError:
             from google_auth_oauthlib.flow import InstalledAppFlow
             from googleapiclient.discovery import build
             from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-            import io
+            from googleapiclient.errors import HttpError
+            from google_auth_httplib2 import AuthorizedHttp
+            import httplib2
             import os
             from pathlib import Path
             
@@ -123,24 +137,104 @@ DEFAULT_CONFIG = {
     "steam_path": "", 
     "backup_path": "",
     "gdrive_credentials": "",
-    "gdrive_token": ""
+    "gdrive_token": "",
+    "gdrive_jobs": 4,
+    "gdrive_download_chunk_size": 8 * 1024 * 1024,
+    "gdrive_upload_chunk_size": 8 * 1024 * 1024,
+    "gdrive_multipart_threshold": 5 * 1024 * 1024,
+    "gdrive_max_retries": 5,
+    "gdrive_requests_per_second": 0,  # 0 = sem limite local; a cota do Drive é guardada pelo backoff em 429/403
+    "gdrive_stats_file": "",
+    "incremental_backup": False,
+    "manifest_hash": False,
+    "copy_jobs": 4,
+    "backup_mode": "mirror",
+    "snapshot_keep": 30,
+    "link_snapshots": False,
+    "archive_backup": False,
+    "archive_codec": "zlib",
+    "differential_restore": False,
+    "gdrive_restore_staging": False,
+    "gdrive_incremental": False,
+    "gdrive_blob_store": False,
+    "gdrive_pack_small_files": False,
+    "gdrive_pack_threshold": 64 * 1024,
+    "gdrive_bundle_size": 8 * 1024 * 1024,
+    "restore_hash": False
 }
 
+# --- CONFIGURAÇÕES DO COFRE LOCAL ---
+VAULT_MANIFEST_FILE = "vault_manifest.json"
+PROGRESS_INTERVAL = 2.0  # segundos entre mensagens de progresso
+SNAPSHOT_FOLDER = "SteamVault_Snapshots"
+ARCHIVE_FILE = "SteamVault_Backup.svault"
+APPID_INDEX_FILE = "appid_index.json"
+MTIME_TOLERANCE_NS = 2 * 10**9  # FAT/exFAT em pendrives grava mtime com resolução de até 2s
+
+# Módulos do cofre: (título, caminho relativo ao diretório Steam)
+VAULT_MODULES = [
+    ("USERDATA", "userdata"),
+    ("STPLUG-IN", os.path.join("config", "stplug-in")),
+    ("DEPOTCACHE", os.path.join("config", "depotcache")),
+    ("STATS", os.path.join("appcache", "stats")),
+]
+VAULT_DLLS = ["version.dll", "winmm.dll"]
+
 # --- CONFIGURAÇÕES GOOGLE DRIVE ---
+GDRIVE_BATCH_SIZE = 100  # limite de chamadas por requisição batch da API do Drive
+GDRIVE_BATCH_RETRIES = 3
+GDRIVE_BACKOFF_BASE = 1.0  # segundos; dobra a cada tentativa (com jitter)
+GDRIVE_BACKOFF_MAX = 32.0
+GDRIVE_RETRY_STATUS = {429, 500, 502, 503, 504}
+GDRIVE_RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+GDRIVE_PAGE_SIZE = 1000  # máximo de itens por página em files().list
+GDRIVE_PARENTS_PER_QUERY = 50  # pastas combinadas com "or" em uma única consulta de listagem
+GDRIVE_MANIFEST_FILE = "cloud_manifest.json"  # manifesto dos backups incrementais na nuvem
+GDRIVE_BLOB_FOLDER = "blobs"  # conteúdos endereçados pelo SHA-256, compartilhados entre backups
+GDRIVE_BUNDLE_FOLDER = "bundles"  # pacotes .svault com os arquivos pequenos (modo de empacotamento)
 SCOPES = [
     'https://www.googleapis.com/auth/drive.file',
     'https://www.googleapis.com/auth/drive.metadata.readonly'
 ]
 GDRIVE_TOKEN_FILE = "gdrive_token.pickle"
+GDRIVE_SESSION_FILE = "gdrive_upload_sessions.json"  # journal das sessões de upload retomável
+GDRIVE_SESSION_MAX_AGE = 6 * 24 * 3600  # o Drive expira sessões retomáveis após uma semana
 GDRIVE_CREDENTIALS_FILE = "credentials.json"
 
 # --- SERVIÇO GOOGLE DRIVE ---
 class GoogleDriveService:
-    def __init__(self, logger_callback=None):
+    def __init__(self, logger_callback=None, engine=None, backend=None):
         self.creds = None
         self.service = None
         self.log = logger_callback or print
-        self.authenticate()
+        self.engine = engine
+        self.upload_jobs = 1
+        self.download_chunk_size = DEFAULT_CONFIG['gdrive_download_chunk_size']
+        self.upload_chunk_size = DEFAULT_CONFIG['gdrive_upload_chunk_size']
+        self.upload_journal = UploadJournal(GDRIVE_SESSION_FILE)
+        self.multipart_threshold = DEFAULT_CONFIG['gdrive_multipart_threshold']
+        # Métricas por operação: compartilhadas com o engine quando houver um
+        self.api_stats = engine.api_stats if engine is not None else ApiStats()
+        self.max_retries = DEFAULT_CONFIG['gdrive_max_retries']
+        self.rate_limiter = RateLimiter(DEFAULT_CONFIG['gdrive_requests_per_second'])
+        # Cliente HTTP/serviço por thread: o self.service compartilhado não é thread-safe
+        self.local = threading.local()
+        self.owner_thread = threading.get_ident()
+        self.creds_lock = threading.Lock()
+        # Cache de pastas: (id do pai, nome) -> id; pais em known_parents têm todos os filhos no cache
+        self.folder_cache = {}
+        self.known_parents = set()
+        # Arquivos por pasta (listados uma vez): id da pasta -> {nome: {id, md5Checksum, size}}
+        self.file_cache = {}
+        self.file_cache_locks = {}
+        self.cache_lock = threading.Lock()
+        if backend is not None:
+            # Backend alternativo (ex.: OfflineDrive) no lugar da API: sem OAuth
+            self.service = backend
+            self.log("[INFO] Google Drive offline em uso (backend local)")
+        else:
+            self.authenticate()
     
     def authenticate(self):
         """Autentica com Google Drive usando OAuth 2.0"""
@@ -188,11 +282,11 @@ class GoogleDriveService:
             # Testa a conexão tentando listar arquivos em vez de about.get()
             try:
                 # Tenta listar algumas pastas na raiz para testar a conexão
-                results = self.service.files().list(
+                results = self.execute(self.service.files().list(
                     q="'root' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
                     fields="files(id, name)",
                     pageSize=1
-                ).execute()
+                ), "teste de listagem", "list")
                 
                 folders = results.get('files', [])
                 if folders:
@@ -210,15 +304,115 @@ class GoogleDriveService:
             self.log(f"[ERRO] Falha na autenticação do Google Drive: {e}")
             return False
     
+    def configure(self, config):
+        """Aplica as opções de desempenho da configuração (paralelismo, tamanhos de bloco)"""
+        self.upload_jobs = max(1, int(config.get('gdrive_jobs') or 1))
+        self.download_chunk_size = int(config.get('gdrive_download_chunk_size') or DEFAULT_CONFIG['gdrive_download_chunk_size'])
+        # Blocos de upload retomável precisam ser múltiplos de 256 KiB
+        chunk = int(config.get('gdrive_upload_chunk_size') or DEFAULT_CONFIG['gdrive_upload_chunk_size'])
+        self.upload_chunk_size = max(1, chunk // (256 * 1024)) * 256 * 1024
+        self.multipart_threshold = int(config.get('gdrive_multipart_threshold') or 0)
+        self.max_retries = max(1, int(config.get('gdrive_max_retries') or 1))
+        self.rate_limiter = RateLimiter(config.get('gdrive_requests_per_second') or 0)
+
+    @staticmethod
+    def is_retryable(error):
+        """429, 5xx, limite de taxa (403 rateLimitExceeded) e falhas de rede merecem nova tentativa"""
+        if isinstance(error, HttpError):
+            status = getattr(error.resp, 'status', None)
+            return status in GDRIVE_RETRY_STATUS or (status == 403 and any(
+                reason in str(error) for reason in GDRIVE_RATE_LIMIT_REASONS))
+        return isinstance(error, (ConnectionError, TimeoutError, httplib2.HttpLib2Error))
+
+    def backoff_delay(self, attempt, error=None):
+        """Backoff exponencial com jitter completo; respeita Retry-After quando o Drive informa"""
+        retry_after = getattr(getattr(error, 'resp', None), 'get', lambda key: None)('retry-after')
+        if retry_after and str(retry_after).isdigit():
+            return float(retry_after)
+        return random.uniform(0, min(GDRIVE_BACKOFF_MAX, GDRIVE_BACKOFF_BASE * 2 ** attempt))
+
+    def call(self, func, label="requisição", cost=1, op="request", recover=None, attempts=None, transferred=None):
+        """Executor central das chamadas ao Drive: limite de taxa compartilhado e retry com backoff.
+
+        func é uma chamada sem argumentos (request.execute, downloader.next_chunk...);
+        cost é quantas chamadas da cota ela consome (itens de um batch) e op o tipo
+        registrado nas métricas (list, create, update, media...).
+
+        Chamadas não idempotentes (create) informam recover: um erro pode ter chegado depois
+        de o Drive aplicar a operação, então antes de repetir recover() procura o que foi
+        criado e, se achar, o resultado é reaproveitado em vez de gerar uma duplicata.
+        attempts limita as tentativas (padrão: gdrive_max_retries). transferred(resultado)
+        informa os bytes enviados/recebidos por chamadas de mídia, para as métricas.
+        """
+        attempts = attempts or self.max_retries
+        for attempt in range(attempts):
+            if attempt and recover is not None:
+                found = recover()
+                if found is not None:
+                    self.log(f"[INFO] {label}: já aplicado no Drive, resultado reaproveitado")
+                    return found
+            self.rate_limiter.acquire(cost)
+            started = time.perf_counter()
+            try:
+                result = func()
+                self.api_stats.record(op, time.perf_counter() - started,
+                                      size=transferred(result) if transferred else 0)
+                return result
+            except Exception as e:
+                self.api_stats.record(op, time.perf_counter() - started, error=True)
+                if not self.is_retryable(e) or attempt == attempts - 1 or self.is_cancelled():
+                    raise
+                self.api_stats.retry(op)
+                delay = self.backoff_delay(attempt, e)
+                self.log(f"[TENTATIVA {attempt + 1}/{attempts}] {label}: {e} - nova tentativa em {delay:.1f}s")
+                deadline = time.monotonic() + delay
+                while time.monotonic() < deadline and not self.is_cancelled():
+                    time.sleep(min(0.5, deadline - time.monotonic()))
+
+    def execute(self, request, label="requisição", op="request"):
+        """request.execute() pelo executor central"""
+        return self.call(request.execute, label, op=op)
+
+    def current_engine(self):
+        """Engine usado para checar interrupção: o informado ou o deduzido do logger (worker da GUI)"""
+        if self.engine is not None:
+            return self.engine
+        owner = getattr(self.log, '__self__', None)
+        if hasattr(owner, 'running'):
+            return owner
+        return getattr(owner, 'engine', None)
+
+    def is_cancelled(self):
+        engine = self.current_engine()
+        return engine is not None and not engine.running
+
+    def ensure_fresh_credentials(self):
+        """Renova o token uma única vez quando vários workers o encontram expirado"""
+        if self.creds and not self.creds.valid and self.creds.refresh_token:
+            with self.creds_lock:
+                if not self.creds.valid:
+                    self.creds.refresh(Request())
+
+    def get_service(self):
+        """Serviço da thread atual: o principal na thread dona, um cliente próprio nos workers"""
+        if threading.get_ident() == self.owner_thread or self.creds is None:
+            return self.service
+        service = getattr(self.local, 'service', None)
+        if service is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http())
+            service = build('drive', 'v3', http=http, cache_discovery=False)
+            self.local.service = service
+        return service
+
     def test_connection(self):
         """Testa a conexão com o Google Drive"""
         try:
             # Testa listando algumas pastas na raiz
-            results = self.service.files().list(
+            results = self.execute(self.service.files().list(
                 q="'root' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false",
                 fields="files(id, name)",
                 pageSize=5
-            ).execute()
+            ), "teste de conexão", "list")
             
             folders = results.get('files', [])
             self.log(f"[INFO] Conexão testada com sucesso. Encontradas {len(folders)} pastas na raiz:")
@@ -237,12 +431,10 @@ class GoogleDriveService:
         """Cria uma pasta no Google Drive - abordagem W-Cloud com verificação de interrupção"""
         try:
             # Verifica se o backup foi interrompido antes de começar
-            engine = None
-            if hasattr(self, 'log') and hasattr(self.log.__self__, 'running'):
-                engine = self.log.__self__
-                if not engine.running:
-                    self.log("[INFO] Criação de pasta interrompida")
-                    return None
+            engine = self.current_engine()
+            if engine and not engine.running:
+                self.log("[INFO] Criação de pasta interrompida")
+                return None
             # Re-inicializa o cliente para garantir configuração correta
             if not self.service:
                 self.log("[ERRO] Serviço Google Drive não inicializado")
@@ -254,93 +446,251 @@ class GoogleDriveService:
                 'parents': [parent_id]
             }
             
-            # Tenta criar a pasta com retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                # Verifica interrupção antes de cada tentativa
-                if engine and not engine.running:
-                    self.log("[INFO] Criação de pasta interrompida durante tentativa")
-                    return None
-                try:
-                    response = self.service.files().create(
-                        body=folder_metadata,
-                        fields='id'
-                    ).execute()
-                    
-                    folder_id = response.get('id')
-                    if folder_id:
-                        self.log(f"[SUCESSO] Pasta '{folder_name}' criada com ID: {folder_id}")
-                        return folder_id
-                    else:
-                        self.log(f"[ERRO] Resposta vazia ao criar pasta '{folder_name}'")
-                        return None
-                        
-                except Exception as e:
-                    error_details = str(e)
-                    # Tenta extrair detalhes mais específicos do erro
-                    if hasattr(e, 'resp') and hasattr(e.resp, 'status'):
-                        error_details += f" (HTTP {e.resp.status})"
-                    if hasattr(e, 'error_details'):
-                        error_details += f" - Details: {e.error_details}"
-                    
-                    self.log(f"[TENTATIVA {attempt + 1}/{max_retries}] Erro ao criar pasta '{folder_name}': {error_details}")
-                    if attempt < max_retries - 1:
-                        time.sleep(1)  # Espera antes de retry
-                    else:
-                        self.log(f"[ERRO] Falha permanente ao criar pasta '{folder_name}' após {max_retries} tentativas")
-                        return None
+            def recover():
+                folder_id = self.lookup_folder(folder_name, parent_id)
+                return {'id': folder_id} if folder_id else None
+
+            # Retry e limite de taxa ficam a cargo do executor central; antes de repetir, procura a pasta
+            request = self.get_service().files().create(body=folder_metadata, fields='id')
+            response = self.call(request.execute, f"criar pasta '{folder_name}'", op="create", recover=recover)
+            
+            folder_id = response.get('id')
+            if folder_id:
+                self.log(f"[SUCESSO] Pasta '{folder_name}' criada com ID: {folder_id}")
+                self.cache_folder(folder_name, parent_id, folder_id, new=True)
+                return folder_id
+            self.log(f"[ERRO] Resposta vazia ao criar pasta '{folder_name}'")
+            return None
             
         except Exception as e:
-            self.log(f"[ERRO CRÍTICO] Exceção ao criar pasta '{folder_name}': {str(e)}")
+            self.log(f"[ERRO] Falha ao criar pasta '{folder_name}': {self.describe_error(e)}")
             return None
     
     def find_folder(self, folder_name, parent_id='root'):
         """Procura uma pasta existente no Google Drive - abordagem W-Cloud"""
         try:
+            # Consulta o cache antes da API; pai já listado por completo dispensa a consulta
+            with self.cache_lock:
+                cached = self.folder_cache.get((parent_id, folder_name))
+                known = parent_id in self.known_parents
+            if cached:
+                return cached
+            if known:
+                return None
+
             if not self.service:
                 self.log("[ERRO] Serviço Google Drive não inicializado")
                 return None
-                
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and '{parent_id}' in parents and trashed=false"
             
-            # Tenta encontrar a pasta com retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    results = self.service.files().list(
-                        q=query,
-                        fields="files(id, name)",
-                        pageSize=1
-                    ).execute()
-                    
-                    items = results.get('files', [])
-                    if items:
-                        folder_id = items[0]['id']
-                        self.log(f"[INFO] Pasta '{folder_name}' encontrada com ID: {folder_id}")
-                        return folder_id
-                    else:
-                        self.log(f"[INFO] Pasta '{folder_name}' não encontrada")
-                        return None
-                        
-                except Exception as e:
-                    error_details = str(e)
-                    # Tenta extrair detalhes mais específicos do erro
-                    if hasattr(e, 'resp') and hasattr(e.resp, 'status'):
-                        error_details += f" (HTTP {e.resp.status})"
-                    if hasattr(e, 'error_details'):
-                        error_details += f" - Details: {e.error_details}"
-                    
-                    self.log(f"[TENTATIVA {attempt + 1}/{max_retries}] Erro ao procurar pasta '{folder_name}': {error_details}")
-                    if attempt < max_retries - 1:
-                        time.sleep(1)
-                    else:
-                        self.log(f"[ERRO] Falha permanente ao procurar pasta '{folder_name}' após {max_retries} tentativas")
-                        return None
+            folder_id = self.lookup_folder(folder_name, parent_id)
+            if folder_id:
+                self.log(f"[INFO] Pasta '{folder_name}' encontrada com ID: {folder_id}")
+                self.cache_folder(folder_name, parent_id, folder_id)
+                return folder_id
+            self.log(f"[INFO] Pasta '{folder_name}' não encontrada")
+            return None
             
         except Exception as e:
-            self.log(f"[ERRO CRÍTICO] Exceção ao procurar pasta '{folder_name}': {str(e)}")
+            self.log(f"[ERRO] Falha ao procurar pasta '{folder_name}': {self.describe_error(e)}")
             return None
     
+    def lookup_folder(self, folder_name, parent_id):
+        """Consulta a API (sem cache) pelo id da pasta folder_name dentro de parent_id"""
+        query = f"name='{self.quote(folder_name)}' and mimeType='{FOLDER_MIME}' and '{parent_id}' in parents and trashed=false"
+        # Retry e limite de taxa ficam a cargo do executor central
+        results = self.execute(self.get_service().files().list(
+            q=query,
+            fields="files(id, name)",
+            pageSize=1
+        ), f"procurar pasta '{folder_name}'", "list")
+        items = results.get('files', [])
+        return items[0]['id'] if items else None
+
+    @staticmethod
+    def quote(value):
+        """Escapa barra invertida e aspas simples para uso entre aspas em uma consulta q="""
+        return value.replace('\\', '\\\\').replace("'", "\\'")
+
+    @staticmethod
+    def describe_error(error):
+        """Mensagem do erro com status HTTP e detalhes, quando disponíveis"""
+        details = str(error)
+        if hasattr(error, 'resp') and hasattr(error.resp, 'status'):
+            details += f" (HTTP {error.resp.status})"
+        if getattr(error, 'error_details', None):
+            details += f" - Details: {error.error_details}"
+        return details
+
+    def cache_folder(self, folder_name, parent_id, folder_id, new=False):
+        """Registra uma pasta no cache; pastas recém-criadas não têm filhos a consultar"""
+        with self.cache_lock:
+            self.folder_cache[(parent_id, folder_name)] = folder_id
+            if new:
+                self.known_parents.add(folder_id)
+                self.file_cache[folder_id] = {}
+
+    def prime_folder_cache(self, root_id):
+        """Preenche o cache com as subpastas diretas de root_id (uma listagem paginada).
+
+        Só o primeiro nível interessa: a pasta de cada backup é nova, e descer nos backups
+        anteriores (ou listar o Drive inteiro) não economizaria nenhuma consulta.
+        """
+        try:
+            items = self.list_all(f"'{root_id}' in parents and mimeType='{FOLDER_MIME}' and trashed=false", "id, name")
+            with self.cache_lock:
+                self.known_parents.add(root_id)
+                for item in items:
+                    self.folder_cache.setdefault((root_id, item['name']), item['id'])
+            count = len(items)
+            self.log(f"[INFO] Cache de pastas carregado ({count} pastas).")
+            return True
+        except Exception as e:
+            self.log(f"[AVISO] Falha ao carregar cache de pastas: {e}")
+            return False
+
+    def execute_batch(self, requests, label="operações", recover=None):
+        """Executa chamadas em requisições batch (até GDRIVE_BATCH_SIZE cada), com retry por item.
+
+        requests: lista de (chave, fábrica) onde fábrica(service) devolve o HttpRequest.
+        Para chamadas não idempotentes (create), recover(chaves) -> {chave: resultado} procura
+        no Drive os itens que falharam antes de repeti-los, e o batch inteiro não é repetido
+        às cegas. Retorna (resultados, erros), ambos indexados pela chave.
+        """
+        service = self.get_service()
+        results, errors = {}, {}
+        pending = list(requests)
+        for attempt in range(GDRIVE_BATCH_RETRIES):
+            if not pending or self.is_cancelled():
+                break
+            failed = {}
+            for start in range(0, len(pending), GDRIVE_BATCH_SIZE):
+                if self.is_cancelled():
+                    break
+                chunk = pending[start:start + GDRIVE_BATCH_SIZE]
+                factories = dict(chunk)
+                # Erros de tentativas anteriores não valem mais: o item vai de novo
+                for key, _ in chunk:
+                    errors.pop(key, None)
+
+                def callback(request_id, response, exception):
+                    if exception is not None:
+                        errors[request_id] = exception
+                        failed[request_id] = factories[request_id]
+                    else:
+                        results[request_id] = response
+                        errors.pop(request_id, None)
+
+                batch = service.new_batch_http_request(callback=callback)
+                for key, factory in chunk:
+                    batch.add(factory(service), request_id=key)
+                try:
+                    self.call(batch.execute, f"batch de {label}", cost=len(chunk), op="batch",
+                              attempts=1 if recover else None)
+                except Exception as e:
+                    # Falha da requisição inteira: todos os itens ainda sem resposta voltam para a fila
+                    for key, factory in chunk:
+                        if key not in results and key not in failed:
+                            errors[key] = e
+                            failed[key] = factory
+            # Itens com erro definitivo (404, 400...) não voltam para a fila
+            pending = [(key, factory) for key, factory in failed.items() if self.is_retryable(errors.get(key))]
+            if pending and attempt < GDRIVE_BATCH_RETRIES - 1:
+                self.log(f"[TENTATIVA {attempt + 1}/{GDRIVE_BATCH_RETRIES}] {len(pending)} {label} falharam no batch, repetindo...")
+                time.sleep(self.backoff_delay(attempt))
+                if recover:
+                    # A falha pode ter chegado depois de o Drive aplicar o item: reaproveita o que já existe
+                    found = recover([key for key, _ in pending]) or {}
+                    for key, result in found.items():
+                        results[key] = result
+                        errors.pop(key, None)
+                    pending = [(key, factory) for key, factory in pending if key not in found]
+        return results, errors
+
+    def ensure_folder_paths(self, root_id, rel_paths):
+        """Garante as pastas (caminhos relativos com '/') sob root_id, nível a nível em batch.
+
+        Pastas no cache não geram chamadas; pais ainda não listados são consultados em
+        um único batch por nível e as ausentes são criadas em outro. Retorna {caminho: id}.
+        """
+        ids = {'': root_id}
+
+        def lookup(rels):
+            """Consulta em batch as pastas rels (pais já resolvidos em ids) -> {caminho: {'id'}}"""
+            def list_factory(parent_id, name):
+                query = f"name='{self.quote(name)}' and mimeType='{FOLDER_MIME}' and '{parent_id}' in parents and trashed=false"
+                return lambda service: service.files().list(q=query, fields="files(id, name)", pageSize=1)
+            requests = []
+            for rel in rels:
+                parent_rel, _, name = rel.rpartition('/')
+                requests.append((rel, list_factory(ids[parent_rel], name)))
+            results, _ = self.execute_batch(requests, "consultas de pasta")
+            found = {}
+            for rel in rels:
+                items = (results.get(rel) or {}).get('files', [])
+                if items:
+                    found[rel] = {'id': items[0]['id']}
+            return found
+
+        by_depth = {}
+        for rel in set(rel_paths):
+            rel = rel.strip('/')
+            if rel:
+                by_depth.setdefault(rel.count('/'), []).append(rel)
+
+        for depth in sorted(by_depth):
+            if self.is_cancelled():
+                break
+            lookups, creates = [], []
+            for rel in sorted(by_depth[depth]):
+                parent_rel, _, name = rel.rpartition('/')
+                parent_id = ids.get(parent_rel)
+                if not parent_id:
+                    continue  # pai não pôde ser criado
+                with self.cache_lock:
+                    cached = self.folder_cache.get((parent_id, name))
+                    known = parent_id in self.known_parents
+                if cached:
+                    ids[rel] = cached
+                elif known:
+                    creates.append(rel)
+                else:
+                    lookups.append(rel)
+
+            if lookups:
+                found = lookup(lookups)
+                for rel in lookups:
+                    if rel in found:
+                        parent_rel, _, name = rel.rpartition('/')
+                        ids[rel] = found[rel]['id']
+                        self.cache_folder(name, ids[parent_rel], found[rel]['id'])
+                    else:
+                        creates.append(rel)
+
+            if creates:
+                def create_factory(parent_id, name):
+                    body = {'name': name, 'mimeType': FOLDER_MIME, 'parents': [parent_id]}
+                    return lambda service: service.files().create(body=body, fields='id')
+                requests = []
+                for rel in creates:
+                    parent_rel, _, name = rel.rpartition('/')
+                    requests.append((rel, create_factory(ids[parent_rel], name)))
+                # Antes de repetir uma criação que falhou, procura a pasta pelo nome (evita duplicatas)
+                results, errors = self.execute_batch(requests, "criações de pasta", recover=lookup)
+                created = 0
+                for rel in creates:
+                    parent_rel, _, name = rel.rpartition('/')
+                    folder_id = (results.get(rel) or {}).get('id')
+                    if folder_id:
+                        ids[rel] = folder_id
+                        self.cache_folder(name, ids[parent_rel], folder_id, new=True)
+                        created += 1
+                    else:
+                        self.log(f"[ERRO] Falha ao criar pasta '{rel}': {errors.get(rel, 'resposta vazia')}")
+                self.log(f"[INFO] {created} pastas criadas em batch (nível {depth + 1}).")
+
+        ids.pop('')
+        return ids
+
     def ensure_folder_exists(self, folder_name, parent_id='root'):
         """Garante que uma pasta exista, criando se necessário"""
         self.log(f"[INFO] Verificando pasta '{folder_name}' no pai '{parent_id}'")
@@ -356,74 +706,87 @@ class GoogleDriveService:
             self.log(f"[INFO] Pasta '{folder_name}' já existe no Google Drive com ID: {folder_id}")
         return folder_id
     
-    def upload_file(self, file_path, folder_id):
-        """Faz upload de um arquivo para o Google Drive"""
-        try:
-            file_name = os.path.basename(file_path)
-            file_metadata = {
-                'name': file_name,
-                'parents': [folder_id]
-            }
-            
-            media = MediaFileUpload(file_path, resumable=True)
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
-            
-            self.log(f"[UPLOAD] {file_name} enviado para Google Drive")
-            return file.get('id')
-        except Exception as e:
-            self.log(f"[ERRO] Falha no upload: {e}")
-            return None
-    
-    def upload_folder(self, local_folder_path, gdrive_folder_id):
-        """Faz upload recursivo de uma pasta para o Google Drive com verificação de interrupção"""
+    def upload_folder(self, local_folder_path, gdrive_folder_id, jobs=None):
+        """Faz upload recursivo de uma pasta para o Google Drive com verificação de interrupção.
+
+        As pastas são garantidas em batch nível a nível; os arquivos são enviados por até
+        'jobs' workers (padrão: self.upload_jobs), cada um com seu próprio cliente HTTP.
+        """
         try:
             # Verifica se temos acesso ao engine para checar interrupção
-            engine = None
-            if hasattr(self, 'log') and hasattr(self.log.__self__, 'running'):
-                engine = self.log.__self__
-            
+            engine = self.current_engine()
+            jobs = max(1, int(jobs or self.upload_jobs or 1))
+            counts = {'ok': 0, 'failed': 0}
+            aborted = []
+
+            def upload(file_path, folder_id):
+                if engine and not engine.running:
+                    return 'failed'
+                self.ensure_fresh_credentials()
+                return 'ok' if self.upload_file(file_path, folder_id) else 'failed'
+
+            # Uma passada local coleta a estrutura; as pastas remotas são garantidas em batch por nível
+            tree = []
             for root, dirs, files in os.walk(local_folder_path):
-                # Verifica se o backup foi interrompido
                 if engine and not engine.running:
                     self.log("[INFO] Upload interrompido pelo usuário")
                     return False
-                    
-                # Calcula o caminho relativo para manter a estrutura
                 rel_path = os.path.relpath(root, local_folder_path)
-                if rel_path == '.':
-                    current_gdrive_folder_id = gdrive_folder_id
-                else:
-                    # Cria subpastas necessárias
-                    folder_parts = rel_path.split(os.sep)
-                    current_gdrive_folder_id = gdrive_folder_id
-                    for part in folder_parts:
-                        # Verifica interrupção novamente
-                        if engine and not engine.running:
-                            return False
-                        subfolder_id = self.find_folder(part, current_gdrive_folder_id)
-                        if not subfolder_id:
-                            subfolder_id = self.create_folder(part, current_gdrive_folder_id)
-                        current_gdrive_folder_id = subfolder_id
-                        if not current_gdrive_folder_id:
-                            self.log(f"[ERRO] Falha ao criar subpasta {part}")
-                            return False
-                
-                # Faz upload dos arquivos nesta pasta
-                for file_name in files:
-                    # Verifica interrupção antes de cada upload
-                    if engine and not engine.running:
-                        return False
-                    file_path = os.path.join(root, file_name)
-                    self.upload_file(file_path, current_gdrive_folder_id)
-                    
-            return True
+                tree.append(('' if rel_path == '.' else rel_path.replace(os.sep, '/'), root, files))
+
+            path_ids = self.ensure_folder_paths(gdrive_folder_id, [rel for rel, _, _ in tree])
+            path_ids[''] = gdrive_folder_id
+
+            def tasks():
+                for rel_path, root, files in tree:
+                    current_gdrive_folder_id = path_ids.get(rel_path)
+                    if not current_gdrive_folder_id:
+                        self.log(f"[ERRO] Falha ao criar subpasta {rel_path}")
+                        aborted.append(True)
+                        continue
+                    # Faz upload dos arquivos nesta pasta
+                    for file_name in files:
+                        yield os.path.join(root, file_name), current_gdrive_folder_id
+
+            run_bounded(tasks(), upload, counts, jobs, lambda: not (engine and not engine.running))
+            if counts['failed'] and not self.is_cancelled():
+                self.log(f"[AVISO] {counts['failed']} arquivos falharam no upload.")
+            return not aborted and not self.is_cancelled()
         except Exception as e:
             self.log(f"[ERRO] Falha no upload da pasta: {e}")
             return False
+
+    def upload_files(self, root_id, files, jobs=None):
+        """Envia apenas os arquivos informados [(relativo, caminho local)] para sob root_id.
+
+        O nome no Drive é o último componente do relativo (pode diferir do nome local).
+        As pastas necessárias são garantidas em batch; retorna {relativo: recurso do Drive}
+        para cada arquivo enviado com sucesso.
+        """
+        results = {}
+        folders = set()
+        for rel, _ in files:
+            parts = rel.split('/')[:-1]
+            folders.update('/'.join(parts[:depth]) for depth in range(1, len(parts) + 1))
+        folder_ids = self.ensure_folder_paths(root_id, folders)
+        folder_ids[''] = root_id
+
+        def upload(rel, local_path):
+            folder_id = folder_ids.get(rel.rpartition('/')[0])
+            if not folder_id or self.is_cancelled():
+                return 'failed'
+            self.ensure_fresh_credentials()
+            resource = self.upload_file(local_path, folder_id, rel.rpartition('/')[2])
+            if not resource:
+                return 'failed'
+            results[rel] = resource
+            return 'ok'
+
+        counts = run_bounded(iter(files), upload, {'ok': 0, 'failed': 0},
+                             max(1, int(jobs or self.upload_jobs or 1)), lambda: not self.is_cancelled())
+        if counts['failed'] and not self.is_cancelled():
+            self.log(f"[AVISO] {counts['failed']} arquivos falharam no upload.")
+        return results
     
     def list_backups(self, folder_name="SteamVault_Backup"):
         """Lista backups disponíveis no Google Drive"""
@@ -432,149 +795,1516 @@ class GoogleDriveService:
             if not folder_id:
                 return []
             
-            query = f"'{folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(q=query, fields="files(id, name, createdTime)").execute()
-            items = results.get('files', [])
+            query = f"'{folder_id}' in parents and mimeType='{FOLDER_MIME}' and trashed=false"
+            items = [item for item in self.list_all(query, "id, name, createdTime") if item['name'] != GDRIVE_BLOB_FOLDER]
             return sorted(items, key=lambda x: x.get('createdTime', ''), reverse=True)
         except Exception as e:
             self.log(f"[ERRO] Falha ao listar backups: {e}")
             return []
     
-    def download_folder(self, gdrive_folder_id, local_destination):
+    def list_all(self, query, fields="id, name"):
+        """Executa files().list seguindo nextPageToken até o fim, pedindo apenas os campos informados"""
+        service = self.get_service()
+        items = []
+        page_token = None
+        while True:
+            results = self.execute(service.files().list(
+                q=query,
+                fields=f"nextPageToken, files({fields})",
+                pageSize=GDRIVE_PAGE_SIZE,
+                pageToken=page_token
+            ), "listagem", "list")
+            items.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return items
+
+    def list_tree(self, root_id):
+        """Lista a árvore inteira de uma pasta, nível a nível.
+
+        As pastas de cada nível são combinadas em consultas "'a' in parents or 'b' in parents",
+        então o número de listagens depende da profundidade e não da quantidade de pastas.
+        Retorna (pastas {relativo: id}, arquivos [(relativo, item)]), com relativos usando '/'.
+        """
+        folders = {'': root_id}
+        files = []
+        level = {root_id: ''}
+        while level:
+            next_level = {}
+            parent_ids = list(level)
+            for start in range(0, len(parent_ids), GDRIVE_PARENTS_PER_QUERY):
+                chunk = parent_ids[start:start + GDRIVE_PARENTS_PER_QUERY]
+                parents = " or ".join(f"'{parent_id}' in parents" for parent_id in chunk)
+                query = f"({parents}) and trashed=false"
+                for item in self.list_all(query, "id, name, mimeType, parents, size, md5Checksum"):
+                    parent = next((p for p in item.get('parents', []) if p in level), None)
+                    if parent is None:
+                        continue
+                    rel = f"{level[parent]}/{item['name']}" if level[parent] else item['name']
+                    if item['mimeType'] == FOLDER_MIME:
+                        folders[rel] = item['id']
+                        next_level[item['id']] = rel
+                    else:
+                        files.append((rel, item))
+            level = next_level
+        return folders, files
+
+    def download_folder(self, gdrive_folder_id, local_destination, jobs=None):
         """Baixa uma pasta do Google Drive recursivamente com verificação de interrupção"""
         try:
-            # Verifica se temos acesso ao engine através do worker
-            engine = None
-            if hasattr(self, 'log'):
-                # O logger é um bound method do worker, então __self__ é o worker
-                worker = getattr(self.log, '__self__', None)
-                if worker and hasattr(worker, 'engine'):
-                    engine = worker.engine
+            # Engine associado (ou o do worker da GUI) para checar interrupção
+            engine = self.current_engine()
             
             # Verifica interrupção antes de começar
             if engine and not engine.running:
                 self.log("[INFO] Download da pasta interrompido antes de iniciar")
                 return False
             
-            # Primeiro, baixa os arquivos na pasta raiz
-            query = f"'{gdrive_folder_id}' in parents and trashed=false"
-            results = self.service.files().list(q=query, fields="files(id, name, mimeType)").execute()
-            items = results.get('files', [])
-            
-            # Cria diretório local se não existir
-            os.makedirs(local_destination, exist_ok=True)
-            
-            for item in items:
-                # Verifica interrupção em cada item
-                if engine and not engine.running:
-                    self.log("[INFO] Download da pasta interrompido pelo usuário")
-                    return False
-                    
-                if item['mimeType'] == 'application/vnd.google-apps.folder':
-                    # Pasta - chama recursivamente
-                    subfolder_path = os.path.join(local_destination, item['name'])
-                    self.download_folder(item['id'], subfolder_path)
-                else:
-                    # Arquivo - faz download
-                    self.download_file(item['id'], os.path.join(local_destination, item['name']))
-            
-            return True
+            # Uma listagem da árvore inteira; recria também as pastas vazias
+            folders, files = self.list_tree(gdrive_folder_id)
+            for rel in folders:
+                os.makedirs(os.path.join(local_destination, *rel.split('/')), exist_ok=True)
+            return self.download_files(files, local_destination, jobs)
         except Exception as e:
             self.log(f"[ERRO] Falha no download da pasta: {e}")
             return False
+
+    def download_files(self, files, local_destination, jobs=None):
+        """Baixa uma lista [(relativo, item)] para local_destination, em paralelo"""
+        try:
+            def download(rel, item):
+                ok = self.download_file(item['id'], os.path.join(local_destination, *rel.split('/')))
+                return 'done' if ok else 'failed'
+
+            counts = run_bounded(iter(files), download, {'done': 0, 'failed': 0},
+                                 jobs or self.upload_jobs, lambda: not self.is_cancelled())
+            if self.is_cancelled():
+                self.log("[INFO] Download da pasta interrompido pelo usuário")
+                return False
+            if counts['failed']:
+                self.log(f"[AVISO] {counts['failed']} arquivos falharam no download.")
+            return True
+        except Exception as e:
+            self.log(f"[ERRO] Falha no download dos arquivos: {e}")
+            return False
     
-    def download_file(self, file_id, local_path):
-        """Baixa um arquivo do Google Drive com verificação de interrupção"""
+    def download_file(self, file_id, local_path, chunk_size=None):
+        """Baixa um arquivo do Google Drive com verificação de interrupção.
+
+        Os blocos são gravados direto em um arquivo temporário ao lado do destino, que é
+        renomeado atomicamente ao final: a memória usada não depende do tamanho do arquivo.
+        """
+        tmp_path = None
+        started = time.perf_counter()
         try:
-            # Verifica se temos acesso ao engine através do worker
-            engine = None
-            if hasattr(self, 'log'):
-                worker = getattr(self.log, '__self__', None)
-                if worker and hasattr(worker, 'engine'):
-                    engine = worker.engine
+            # Engine associado (ou o do worker da GUI) para checar interrupção
+            engine = self.current_engine()
             
             # Verifica interrupção antes de começar
             if engine and not engine.running:
                 self.log("[INFO] Download do arquivo interrompido antes de iniciar")
                 return False
             
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while done is False:
-                # Verifica interrupção durante o download
-                if engine and not engine.running:
-                    self.log("[INFO] Download do arquivo interrompido pelo usuário")
-                    return False
-                status, done = downloader.next_chunk()
-            
-            # Escreve o arquivo localmente
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                fh.seek(0)
-                f.write(fh.read())
+            tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.part"
+            request = self.get_service().files().get_media(fileId=file_id)
+            with open(tmp_path, 'wb') as fh:
+                chunk_size = chunk_size or self.download_chunk_size
+                # Backends alternativos fornecem o próprio downloader
+                make_downloader = getattr(request, 'downloader', None)
+                downloader = make_downloader(fh, chunk_size) if make_downloader else MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+                done = False
+                while done is False:
+                    # Verifica interrupção durante o download
+                    if engine and not engine.running:
+                        self.log("[INFO] Download do arquivo interrompido pelo usuário")
+                        return False
+                    position = fh.tell()
+                    status, done = self.call(downloader.next_chunk, f"download de {os.path.basename(local_path)}", op="media",
+                                             transferred=lambda result: fh.tell() - position)
             
+            os.replace(tmp_path, local_path)
+            tmp_path = None
+            self.api_stats.record("download:file", time.perf_counter() - started, size=os.path.getsize(local_path))
             self.log(f"[DOWNLOAD] {os.path.basename(local_path)} baixado do Google Drive")
             return True
         except Exception as e:
+            self.api_stats.record("download:file", time.perf_counter() - started, error=True)
             self.log(f"[ERRO] Falha no download do arquivo: {e}")
             return False
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                try: os.remove(tmp_path)
+                except OSError: pass
     
     def delete_folder(self, folder_id):
         """Deleta uma pasta do Google Drive"""
         try:
-            self.service.files().delete(fileId=folder_id).execute()
+            self.execute(self.get_service().files().delete(fileId=folder_id), "apagar pasta", "delete")
+            self.reset_file_cache()
             self.log(f"[INFO] Pasta deletada do Google Drive")
             return True
         except Exception as e:
             self.log(f"[ERRO] Falha ao deletar pasta: {e}")
             return False
     
+    def reset_file_cache(self):
+        """Descarta as listagens de arquivos (o Drive pode ter mudado entre execuções)"""
+        with self.cache_lock:
+            self.file_cache = {}
+            self.file_cache_locks = {}
+
+    def folder_files(self, folder_id):
+        """Arquivos de uma pasta {nome: {id, md5Checksum, size}}, listados uma única vez.
+
+        Pastas criadas nesta sessão começam vazias e não geram listagem; workers que
+        enviam para a mesma pasta aguardam a mesma listagem em vez de repeti-la.
+        """
+        with self.cache_lock:
+            files = self.file_cache.get(folder_id)
+            if files is not None:
+                return files
+            lock = self.file_cache_locks.setdefault(folder_id, threading.Lock())
+        with lock:
+            with self.cache_lock:
+                files = self.file_cache.get(folder_id)
+            if files is None:
+                query = f"'{folder_id}' in parents and mimeType!='{FOLDER_MIME}' and trashed=false"
+                files = {}
+                for item in self.list_all(query, "id, name, md5Checksum, size"):
+                    files.setdefault(item['name'], item)
+                with self.cache_lock:
+                    files = self.file_cache.setdefault(folder_id, files)
+            return files
+
+    def seed_file_cache(self, folder_id, items):
+        """Registra uma listagem de arquivos já feita pelo chamador, para folder_files não repeti-la"""
+        files = {}
+        for item in items:
+            files.setdefault(item['name'], item)
+        with self.cache_lock:
+            self.file_cache[folder_id] = files
+
+    def delete_file(self, folder_id, filename, file_id):
+        """Apaga um arquivo enviado e o tira do cache da pasta"""
+        self.execute(self.get_service().files().delete(fileId=file_id), f"apagar {filename}", "delete")
+        with self.cache_lock:
+            self.file_cache.get(folder_id, {}).pop(filename, None)
+
+    def cache_file(self, folder_id, filename, resource):
+        """Registra o arquivo enviado, para que um novo envio do mesmo nome atualize em vez de duplicar"""
+        if isinstance(resource, dict) and resource.get('id'):
+            with self.cache_lock:
+                self.file_cache.setdefault(folder_id, {})[filename] = dict(resource, name=filename)
+
     def upload_file(self, local_path, gdrive_folder_id, filename=None):
-        """Faz upload de um arquivo para o Google Drive substituindo se já existir com verificação de interrupção"""
+        """Faz upload de um arquivo para o Google Drive substituindo se já existir com verificação de interrupção.
+
+        Create, update ou nada é decidido pela listagem da pasta em cache (folder_files):
+        arquivo com mesmo tamanho e MD5 no Drive não é reenviado.
+        """
         try:
             if not filename:
                 filename = os.path.basename(local_path)
             
             # Verifica se o backup foi interrompido antes de começar o upload
-            engine = None
-            if hasattr(self, 'log') and hasattr(self.log.__self__, 'running'):
-                engine = self.log.__self__
-                if not engine.running:
-                    self.log("[INFO] Upload interrompido antes de iniciar")
-                    return False
+            if self.is_cancelled():
+                self.log("[INFO] Upload interrompido antes de iniciar")
+                return False
+            service = self.get_service()
             
-            # Primeiro verifica se arquivo já existe na pasta
-            query = f"name='{filename}' and '{gdrive_folder_id}' in parents and trashed=false"
-            results = self.service.files().list(q=query, fields="files(id, name)").execute()
-            existing_files = results.get('files', [])
+            # Uma listagem por pasta (em cache) no lugar de uma consulta por arquivo
+            existing = self.folder_files(gdrive_folder_id).get(filename)
+            size = os.path.getsize(local_path)
+            if (existing and existing.get('md5Checksum') and int(existing.get('size', -1)) == size and
+                    VaultManifest.file_hash(local_path, algorithm='md5') == existing['md5Checksum']):
+                self.api_stats.record('upload:skipped', 0.0)
+                self.log(f"[UPLOAD] {filename} idêntico no Google Drive, mantido")
+                return {key: existing[key] for key in ('id', 'md5Checksum', 'size')}
             
-            media = MediaFileUpload(local_path, resumable=True)
+            # Pequenos: uma única requisição multipart; acima do limiar: retomável em blocos
+            resumable = size > self.multipart_threshold
+            media = MediaFileUpload(local_path, chunksize=self.upload_chunk_size, resumable=resumable)
             file_metadata = {'name': filename, 'parents': [gdrive_folder_id]}
+            started = time.perf_counter()
             
-            if existing_files:
-                # Substitui o arquivo existente
-                file_id = existing_files[0]['id']
-                self.service.files().update(
+            if existing:
+                # Substitui o arquivo existente (parents não é gravável no update)
+                file_id = existing['id']
+                request = service.files().update(
                     fileId=file_id,
-                    body=file_metadata,
-                    media_body=media
-                ).execute()
+                    body={'name': filename},
+                    media_body=media,
+                    fields='id, md5Checksum, size'
+                )
+                if resumable:
+                    resource = self.run_resumable(request, local_path, gdrive_folder_id, journal=False)
+                else:
+                    resource = self.call(request.execute, f"upload de {filename}", op="update",
+                                         transferred=lambda result: size)
+                if resource is None:
+                    return False
                 self.log(f"[UPLOAD] {filename} atualizado no Google Drive (substituído)")
             else:
                 # Cria novo arquivo
-                self.service.files().create(
+                request = service.files().create(
                     body=file_metadata,
-                    media_body=media
-                ).execute()
+                    media_body=media,
+                    fields='id, md5Checksum, size'
+                )
+                if resumable:
+                    # O protocolo retomável consulta o status antes de reenviar: não duplica
+                    resource = self.run_resumable(request, local_path, gdrive_folder_id)
+                else:
+                    resource = self.call(request.execute, f"upload de {filename}", op="create",
+                                         recover=lambda: self.find_uploaded(local_path, gdrive_folder_id, filename, size),
+                                         transferred=lambda result: size)
+                if resource is None:
+                    return False
                 self.log(f"[UPLOAD] {filename} enviado para Google Drive")
             
-            return True
+            # Tempo e bytes por estratégia, para ajustar limiar e tamanho de bloco
+            self.api_stats.record('upload:resumable' if resumable else 'upload:multipart', time.perf_counter() - started, size=size)
+            self.cache_file(gdrive_folder_id, filename, resource)
+            # O recurso (id e MD5 calculado pelo Drive) alimenta o manifesto incremental
+            return resource or True
         except Exception as e:
             self.log(f"[ERRO] Falha no upload do arquivo {filename}: {e}")
             return False
 
+    def find_uploaded(self, local_path, gdrive_folder_id, filename, size):
+        """Arquivo filename já presente na pasta com o mesmo tamanho e MD5 do local (create aplicado, resposta perdida)"""
+        query = f"name='{self.quote(filename)}' and '{gdrive_folder_id}' in parents and trashed=false"
+        md5 = None
+        for item in self.list_all(query, "id, md5Checksum, size"):
+            if int(item.get('size', -1)) != size:
+                continue
+            md5 = md5 or VaultManifest.file_hash(local_path, algorithm='md5')
+            if item.get('md5Checksum') == md5:
+                return item
+        return None
+
+    def session_status(self, request, uri, size):
+        """Consulta uma sessão retomável: PUT vazio com Content-Range "bytes */total".
+
+        Retorna (offset confirmado, recurso); o recurso só vem quando o upload já foi
+        concluído. Sessão expirada ou desconhecida (404/410) gera HttpError.
+        """
+        def query():
+            resp, content = request.http.request(uri, method='PUT', body=b'',
+                                                 headers={'Content-Length': '0', 'Content-Range': f'bytes */{size}'})
+            if resp.status in GDRIVE_RETRY_STATUS or resp.status in (404, 410):
+                raise HttpError(resp, content, uri=uri)
+            return resp, content
+
+        resp, content = self.call(query, "status do upload", op="upload_status")
+        if resp.status in (200, 201):
+            return size, json.loads(content.decode('utf-8'))
+        if resp.status != 308:
+            raise HttpError(resp, content, uri=uri)
+        # 308: "Range: bytes=0-N" com o que o servidor já tem (ausente = nada recebido)
+        received = resp.get('range')
+        return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+
+    def run_resumable(self, request, local_path, gdrive_folder_id, journal=True):
+        """Envia um upload retomável bloco a bloco, registrando a sessão no journal.
+
+        Arquivos maiores que um bloco têm URI e offset gravados após cada bloco; se o envio
+        for interrompido (parada ou queda do processo), a próxima execução retoma a mesma
+        sessão. Retorna o recurso criado ou None se interrompido.
+        """
+        st = os.stat(local_path)
+        journal = journal and st.st_size > self.upload_chunk_size
+        entry = self.upload_journal.get(local_path, st) if journal else None
+        response = None
+        if entry:
+            # O Drive informa o offset realmente recebido (ou o arquivo, se já concluído)
+            try:
+                offset, response = self.session_status(request, entry['uri'], st.st_size)
+            except HttpError as e:
+                if e.resp.status not in (404, 410):
+                    raise
+                # Sessão expirada ou desconhecida: recomeça do zero
+                self.upload_journal.discard(local_path)
+                entry = None
+            else:
+                if response is None:
+                    request.resumable_uri = entry['uri']
+                    request.resumable_progress = offset
+                    self.log(f"[UPLOAD] Retomando {os.path.basename(local_path)} a partir de "
+                             f"{offset // 1024} KiB de {st.st_size // 1024} KiB")
+
+        while response is None:
+            if self.is_cancelled():
+                self.log(f"[INFO] Upload de {os.path.basename(local_path)} interrompido (será retomado)")
+                return None
+            # Bytes do bloco: avanço do offset (o último bloco não atualiza resumable_progress)
+            progress = request.resumable_progress
+            try:
+                _, response = self.call(request.next_chunk, f"upload de {os.path.basename(local_path)}", op="upload_chunk",
+                                        transferred=lambda result: (st.st_size if result[1] is not None
+                                                                    else request.resumable_progress) - progress)
+            except HttpError as e:
+                if entry and e.resp.status in (404, 410):
+                    # Sessão expirada ou desconhecida: recomeça do zero
+                    self.upload_journal.discard(local_path)
+                    request.resumable_uri = None
+                    request.resumable_progress = 0
+                    entry = None
+                    continue
+                raise
+            if response is None and journal:
+                self.upload_journal.record(local_path, st, request.resumable_uri, request.resumable_progress,
+                                           self.upload_chunk_size, entry['parent'] if entry else gdrive_folder_id)
+        if journal:
+            self.upload_journal.discard(local_path)
+
+        # Sessão iniciada em outro backup: move o arquivo concluído para a pasta atual
+        if entry and entry.get('parent') and entry['parent'] != gdrive_folder_id:
+            self.execute(self.get_service().files().update(fileId=response['id'], addParents=gdrive_folder_id,
+                                                          removeParents=entry['parent'], fields='id'), "mover arquivo retomado", "update")
+        return response
+
+# --- GOOGLE DRIVE OFFLINE (TESTES E BENCHMARK) ---
+class OfflineDrive:
+    """Substituto em memória do serviço do Drive (files().list/create/update/get_media/delete e batch).
+
+    Implementa apenas o que o GoogleDriveService usa, com latência por requisição e taxa de
+    erros (HTTP 503) configuráveis, para medir chamadas e tempo sem rede:
+    GoogleDriveService(backend=OfflineDrive(latency=0.05, error_rate=0.01)).
+    commit_error_rate simula a resposta perdida: a operação é aplicada no servidor e o
+    cliente ainda recebe 503 (o caso que gera duplicatas quando um create é repetido).
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None, commit_error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.commit_error_rate = commit_error_rate
+        self.random = random.Random(seed)
+        self.items = {}
+        self.data = {}
+        self.sessions = {}
+        self.session_actions = {}  # metadados fixados no início da sessão, como no Drive
+        self.completed = {}  # sessões de upload concluídas -> recurso (consulta de status após resposta perdida)
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    def files(self):
+        return OfflineFiles(self)
+
+    def new_batch_http_request(self, callback=None):
+        return OfflineBatch(self, callback)
+
+    def stats(self):
+        with self.lock:
+            return {'calls': dict(self.calls), 'requests': sum(self.calls.values()),
+                    'bytes_up': self.bytes_up, 'bytes_down': self.bytes_down}
+
+    def request(self, kind):
+        """Simula a ida ao servidor: conta a chamada, espera a latência e talvez falha"""
+        with self.lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            fail = self.error_rate and self.random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise HttpError(httplib2.Response({'status': 503}), b'{"error": {"message": "Backend Error (offline)"}}')
+
+    def reply(self):
+        """Simula a volta do servidor: a operação já foi aplicada, mas a resposta pode se perder"""
+        with self.lock:
+            fail = self.commit_error_rate and self.random.random() < self.commit_error_rate
+        if fail:
+            raise HttpError(httplib2.Response({'status': 503}), b'{"error": {"message": "Backend Error after commit (offline)"}}')
+
+    def new_item(self, body):
+        with self.lock:
+            self.next_id += 1
+            file_id = f"offline{self.next_id}"
+            self.items[file_id] = {'id': file_id, 'name': body['name'], 'mimeType': body.get('mimeType', 'application/octet-stream'),
+                                   'parents': list(body.get('parents') or ['root']), 'trashed': False,
+                                   'createdTime': time.strftime("%Y-%m-%dT%H:%M:%S") + f".{self.next_id:09d}Z"}
+            return file_id
+
+    def store(self, file_id, content):
+        with self.lock:
+            self.data[file_id] = content
+            self.bytes_up += len(content)
+            item = self.items[file_id]
+            item['size'] = str(len(content))
+            item['md5Checksum'] = hashlib.md5(content).hexdigest()
+
+    def resource(self, file_id):
+        with self.lock:
+            item = dict(self.items[file_id])
+        return {key: value for key, value in item.items() if key in ('id', 'name', 'mimeType', 'md5Checksum', 'size')}
+
+    @staticmethod
+    def split_query(query, separator):
+        """Divide a consulta em separator fora de aspas e parênteses"""
+        parts, depth, quoted, start, i = [], 0, False, 0, 0
+        while i < len(query):
+            char = query[i]
+            if char == '\\':
+                i += 2
+                continue
+            if char == "'":
+                quoted = not quoted
+            elif not quoted and char == '(':
+                depth += 1
+            elif not quoted and char == ')':
+                depth -= 1
+            elif not quoted and depth == 0 and query.startswith(separator, i):
+                parts.append(query[start:i].strip())
+                start = i + len(separator)
+                i = start
+                continue
+            i += 1
+        parts.append(query[start:].strip())
+        return parts
+
+    def compile_query(self, query):
+        """Converte a consulta do Drive (subconjunto usado pelo app) em um predicado sobre o item"""
+        tests = []
+        for clause in self.split_query(query or '', ' and '):
+            if clause.startswith('(') and clause.endswith(')'):
+                options = [self.compile_query(part) for part in self.split_query(clause[1:-1], ' or ')]
+                tests.append(lambda item, options=options: any(option(item) for option in options))
+                continue
+            match = re.fullmatch(r"'((?:[^'\\]|\\.)*)' in parents", clause)
+            if match:
+                parent = re.sub(r"\\(.)", r"\1", match.group(1))
+                tests.append(lambda item, parent=parent: parent in item['parents'])
+                continue
+            match = re.fullmatch(r"(\w+)\s*(!?=)\s*'((?:[^'\\]|\\.)*)'", clause)
+            if match:
+                field, equal, value = match.group(1), match.group(2) == '=', re.sub(r"\\(.)", r"\1", match.group(3))
+                tests.append(lambda item, field=field, equal=equal, value=value: (item.get(field) == value) == equal)
+                continue
+            if clause == 'trashed=false':
+                tests.append(lambda item: not item['trashed'])
+                continue
+            # Como a API real: consulta malformada (ex.: aspas sem escape) é rejeitada
+            raise HttpError(httplib2.Response({'status': 400}), f'{{"error": {{"message": "Invalid Value: {clause}"}}}}'.encode())
+        return lambda item: all(test(item) for test in tests)
+
+
+class OfflineRequest:
+    """Requisição do OfflineDrive: execute(), ou next_chunk() para uploads retomáveis"""
+
+    def __init__(self, drive, kind, action, media=None, target=None):
+        self.drive = drive
+        self.kind = kind
+        self.action = action
+        self.media = media
+        self.target = target
+        self.resumable_uri = None
+        self.resumable_progress = 0
+        self._in_error_state = False  # estado interno, como no HttpRequest da biblioteca
+        self.http = OfflineHttp(drive)
+
+    def execute(self, num_retries=0):
+        if self.media is not None and self.media.resumable():
+            response = None
+            while response is None:
+                _, response = self.next_chunk()
+            return response
+        self.drive.request(self.kind)
+        response = self.action(self.media.getbytes(0, self.media.size()) if self.media is not None else None)
+        self.drive.reply()
+        return response
+
+    def next_chunk(self, num_retries=0):
+        drive = self.drive
+        try:
+            if self.resumable_uri is None:
+                drive.request('upload_session')
+                with drive.lock:
+                    # URIs únicas, como as do Drive: uma URI antiga nunca aponta para outro upload
+                    self.resumable_uri = f"offline-session-{random.getrandbits(64):016x}"
+                    drive.sessions[self.resumable_uri] = b''
+                    drive.session_actions[self.resumable_uri] = self.action
+            elif self._in_error_state:
+                drive.request('upload_status')
+                with drive.lock:
+                    if self.resumable_uri in drive.completed:
+                        self._in_error_state = False
+                        return None, drive.completed[self.resumable_uri]
+                    if self.resumable_uri not in drive.sessions:
+                        raise HttpError(httplib2.Response({'status': 404}), b'{"error": {"message": "Session not found"}}')
+                    self.resumable_progress = len(drive.sessions[self.resumable_uri])
+                self._in_error_state = False
+            drive.request('upload_chunk')
+        except HttpError:
+            self._in_error_state = True
+            raise
+        size = self.media.size()
+        chunk = self.media.getbytes(self.resumable_progress, self.media.chunksize())
+        with drive.lock:
+            drive.sessions[self.resumable_uri] += chunk
+            progress = len(drive.sessions[self.resumable_uri])
+            done = progress >= size
+            content = drive.sessions.pop(self.resumable_uri) if done else None
+            action = drive.session_actions.pop(self.resumable_uri) if done else None
+        # Retomada por outra requisição: vale o pedido que abriu a sessão (pasta de origem)
+        response = action(content) if done else None
+        if done:
+            with drive.lock:
+                drive.completed[self.resumable_uri] = response
+        try:
+            drive.reply()
+        except HttpError:
+            # Bloco (ou arquivo) gravado, resposta perdida: o cliente consulta o status
+            self._in_error_state = True
+            raise
+        self.resumable_progress = progress
+        return None, response
+
+    def downloader(self, fh, chunksize):
+        return OfflineDownloader(self.drive, self.target, fh, chunksize)
+
+
+class OfflineHttp:
+    """http do OfflineRequest: só a consulta de status de sessão retomável (PUT vazio)"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        drive = self.drive
+        drive.request('upload_status')
+        with drive.lock:
+            if uri in drive.completed:
+                return httplib2.Response({'status': 200}), json.dumps(drive.completed[uri]).encode('utf-8')
+            if uri not in drive.sessions:
+                return httplib2.Response({'status': 404}), b'{"error": {"message": "Session not found"}}'
+            received = len(drive.sessions[uri])
+        headers = {'status': 308}
+        if received:
+            headers['range'] = f"bytes=0-{received - 1}"
+        return httplib2.Response(headers), b''
+
+
+class OfflineDownloader:
+    """Equivalente ao MediaIoBaseDownload para o OfflineDrive (uma requisição por bloco)"""
+
+    def __init__(self, drive, file_id, fh, chunksize):
+        self.drive = drive
+        self.file_id = file_id
+        self.fh = fh
+        self.chunksize = chunksize
+        self.progress = 0
+
+    def next_chunk(self, num_retries=0):
+        self.drive.request('media')
+        with self.drive.lock:
+            content = self.drive.data.get(self.file_id, b'')
+            chunk = content[self.progress:self.progress + self.chunksize]
+            self.drive.bytes_down += len(chunk)
+        self.fh.write(chunk)
+        self.progress += len(chunk)
+        return None, self.progress >= len(content)
+
+
+class OfflineFiles:
+    """files() do OfflineDrive"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q=None, fields=None, pageSize=100, pageToken=None, **kwargs):
+        drive = self.drive
+
+        def action(_):
+            matches = drive.compile_query(q)
+            with drive.lock:
+                items = [dict(item) for item in drive.items.values() if matches(item)]
+            start = int(pageToken or 0)
+            page = {'files': items[start:start + pageSize]}
+            if start + pageSize < len(items):
+                page['nextPageToken'] = str(start + pageSize)
+            return page
+        return OfflineRequest(drive, 'list', action)
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        drive = self.drive
+
+        def action(content):
+            file_id = drive.new_item(body)
+            if content is not None:
+                drive.store(file_id, content)
+            return drive.resource(file_id)
+        return OfflineRequest(drive, 'create', action, media_body)
+
+    def update(self, fileId=None, body=None, media_body=None, addParents=None, removeParents=None, fields=None, **kwargs):
+        drive = self.drive
+
+        def action(content):
+            with drive.lock:
+                item = drive.items[fileId]
+                item.update({key: value for key, value in (body or {}).items() if key != 'parents'})
+                if addParents or removeParents:
+                    item['parents'] = [p for p in item['parents'] if p != removeParents] + ([addParents] if addParents else [])
+            if content is not None:
+                drive.store(fileId, content)
+            return drive.resource(fileId)
+        return OfflineRequest(drive, 'update', action, media_body)
+
+    def get_media(self, fileId=None, **kwargs):
+        return OfflineRequest(self.drive, 'media', None, target=fileId)
+
+    def delete(self, fileId=None, **kwargs):
+        drive = self.drive
+
+        def action(_):
+            with drive.lock:
+                removed = [fileId]
+                while removed:
+                    current = removed.pop()
+                    drive.items.pop(current, None)
+                    drive.data.pop(current, None)
+                    removed.extend(i for i, item in drive.items.items() if current in item['parents'])
+            return None
+        return OfflineRequest(drive, 'delete', action)
+
+
+class OfflineBatch:
+    """Requisição batch do OfflineDrive: uma ida ao servidor, callback por item"""
+
+    def __init__(self, drive, callback):
+        self.drive = drive
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.drive.request('batch')
+        outcomes = []
+        for request_id, request in self.requests:
+            try:
+                # Cada item também pode falhar (limite de taxa por item), antes ou depois de aplicado
+                with self.drive.lock:
+                    fail = self.drive.error_rate and self.drive.random.random() < self.drive.error_rate
+                if fail:
+                    raise HttpError(httplib2.Response({'status': 503}), b'{"error": {"message": "Backend Error (offline)"}}')
+                response = request.action(None)
+                self.drive.reply()
+            except Exception as e:
+                outcomes.append((request_id, None, e))
+            else:
+                outcomes.append((request_id, response, None))
+        # A resposta do batch inteiro também pode se perder depois de tudo aplicado
+        self.drive.reply()
+        for outcome in outcomes:
+            self.callback(*outcome)
+
+# --- MÉTRICAS DE CHAMADAS (GOOGLE DRIVE) ---
+class ApiStats:
+    """Chamadas, erros, retries, bytes e latências por operação (list, create, media, upload:*, file:*...)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ops = {}
+
+    def reset(self):
+        with self.lock:
+            self.ops = {}
+
+    def _entry(self, op):
+        return self.ops.setdefault(op, {'calls': 0, 'errors': 0, 'retries': 0, 'bytes': 0, 'latencies': []})
+
+    def record(self, op, seconds, error=False, size=0):
+        with self.lock:
+            entry = self._entry(op)
+            entry['calls'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['bytes'] += size
+            entry['latencies'].append(seconds)
+
+    def retry(self, op):
+        with self.lock:
+            self._entry(op)['retries'] += 1
+
+    @staticmethod
+    def percentile(values, pct):
+        """Percentil pelo método do vizinho mais próximo (values já ordenado)"""
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+    def summary(self):
+        """{operação: chamadas, erros, retries, bytes, tempo total e p50/p90/p99/máx em ms}"""
+        with self.lock:
+            ops = {op: dict(entry, latencies=sorted(entry['latencies'])) for op, entry in self.ops.items()}
+        summary = {}
+        for op, entry in sorted(ops.items()):
+            latencies = entry['latencies']
+            summary[op] = {
+                'calls': entry['calls'], 'errors': entry['errors'], 'retries': entry['retries'],
+                'bytes': entry['bytes'], 'total_s': round(sum(latencies), 4),
+                'p50_ms': round(self.percentile(latencies, 50) * 1000, 2),
+                'p90_ms': round(self.percentile(latencies, 90) * 1000, 2),
+                'p99_ms': round(self.percentile(latencies, 99) * 1000, 2),
+                'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            }
+        return summary
+
+    def log_summary(self, log, title):
+        summary = self.summary()
+        if not summary:
+            return summary
+        # Operações de API (sem ':') somam as requisições; upload:*, download:* e file:* são por arquivo
+        api_calls = sum(item['calls'] for op, item in summary.items() if ':' not in op)
+        retries = sum(item['retries'] for item in summary.values())
+        log(f"[MÉTRICAS] {title}: {api_calls} requisições ao Drive, {retries} retries")
+        for op, item in summary.items():
+            log(f"[MÉTRICAS] {op:<18} {item['calls']:>6}x  p50 {item['p50_ms']:.0f} ms  p90 {item['p90_ms']:.0f} ms  "
+                f"p99 {item['p99_ms']:.0f} ms  máx {item['max_ms']:.0f} ms  {item['bytes'] // 1024} KiB  "
+                f"{item['retries']} retries  {item['errors']} erros")
+        return summary
+
+    def export(self, path, **extra):
+        """Grava o resumo em JSON (para comparar execuções e pegar regressões)"""
+        report = {'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"), **extra, 'operations': self.summary()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+# --- LIMITE DE TAXA (GOOGLE DRIVE) ---
+class RateLimiter:
+    """Token bucket compartilhado pelos workers: no máximo 'rate' chamadas por segundo, com rajada de até 'rate'.
+
+    rate 0 desativa o limite. Um custo maior que a rajada (batch de 100 itens) é cobrado
+    inteiro: o saldo fica negativo e quem vem depois espera as reposições correspondentes.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(burst or self.rate or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserva o custo inteiro; a espera cobre o saldo negativo (inclusive o de reservas anteriores)
+            self.tokens -= float(cost)
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+# --- EXECUÇÃO PARALELA LIMITADA ---
+def run_bounded(tasks, func, counts, jobs, should_continue=None):
+    """Executa func(*task) para cada tarefa em um pool limitado, somando os resultados em counts.
+
+    tasks pode ser um gerador: ele é consumido sob demanda, com no máximo jobs * 4
+    tarefas pendentes, e should_continue() False cancela o que ainda não começou.
+    """
+    running = should_continue or (lambda: True)
+    if jobs <= 1:
+        for task in tasks:
+            if not running(): break
+            counts[func(*task)] += 1
+        return counts
+
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    pending = set()
+    try:
+        for task in tasks:
+            if not running(): break
+            pending.add(pool.submit(func, *task))
+            if len(pending) >= jobs * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    counts[future.result()] += 1
+    finally:
+        if not running():
+            for future in pending:
+                future.cancel()
+        for future in wait(pending)[0]:
+            if not future.cancelled():
+                counts[future.result()] += 1
+        pool.shutdown(wait=True)
+    return counts
+
+# --- VARREDURA DE ÁRVORE (PASSADA ÚNICA) ---
+def scan_tree(root, on_error=None):
+    """Percorre a árvore com os.scandir em uma única passada, gerando (caminho, relativo, stat).
+
+    Cada diretório é gerado com stat None antes de seus arquivos; o stat dos arquivos
+    vem do próprio DirEntry, sem chamadas extras ao sistema de arquivos.
+    """
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        current = os.path.join(root, rel_dir) if rel_dir else root
+        yield current, rel_dir, None
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(rel)
+                        elif entry.is_file():
+                            yield entry.path, rel, entry.stat()
+                    except OSError as e:
+                        if on_error: on_error(entry.path, e)
+        except OSError as e:
+            if on_error: on_error(current, e)
+
+# --- MOTOR DE CÓPIA (ESTRATÉGIA POR TAMANHO) ---
+FICLONE = 0x40049409  # ioctl do Linux para reflink (btrfs, xfs, ...)
+SMALL_FILE_THRESHOLD = 64 * 1024  # até aqui: uma leitura e uma escrita
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _copy_range(fsrc, fdst, size, syscall):
+    """Copia até o fim do arquivo no kernel (copy_file_range ou sendfile); False se o sistema recusar.
+
+    size (do stat da varredura) é só a estimativa: um arquivo que cresceu desde então
+    é copiado até o EOF, como no shutil.copy2.
+    """
+    offset = 0
+    try:
+        while True:
+            count = max(size - offset, COPY_BUFFER_SIZE)
+            if syscall is os.sendfile:
+                copied = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, count)
+            else:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset, offset)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        offset = -1
+    # Zero bytes de um arquivo não vazio: chamada não suportada neste sistema de arquivos
+    if offset > 0 or (offset == 0 and size == 0):
+        return True
+    fdst.seek(0); fdst.truncate(0)
+    return False
+
+def fast_copy(src, dst, st, try_reflink=False):
+    """Copia src para dst escolhendo a estratégia pelo tamanho; retorna o nome da estratégia.
+
+    Arquivos pequenos: uma leitura e uma escrita. Grandes: reflink (se pedido),
+    os.copy_file_range, os.sendfile e, por fim, cópia com buffer. Os metadados
+    são aplicados uma única vez no final a partir do stat já obtido da origem.
+    """
+    size = st.st_size
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if size <= SMALL_FILE_THRESHOLD:
+            fdst.write(fsrc.read())
+            strategy = 'small'
+        else:
+            strategy = None
+            if try_reflink and sys.platform.startswith('linux'):
+                try:
+                    import fcntl
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    strategy = 'reflink'
+                except OSError:
+                    pass
+            if strategy is None and hasattr(os, 'copy_file_range') and _copy_range(fsrc, fdst, size, os.copy_file_range):
+                strategy = 'copy_file_range'
+            if strategy is None and sys.platform.startswith('linux') and _copy_range(fsrc, fdst, size, os.sendfile):
+                strategy = 'sendfile'
+            if strategy is None:
+                shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+                strategy = 'buffered'
+    # Metadados em um passo: permissões e tempos de acesso/modificação da origem
+    os.chmod(dst, st.st_mode & 0o7777)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return strategy
+
+# --- MANIFESTO DO COFRE (BACKUP INCREMENTAL) ---
+class VaultManifest:
+    """Registro persistente dos arquivos do cofre (caminho relativo, tamanho, mtime e hash opcional)"""
+    VERSION = 1
+
+    def __init__(self, root, use_hash=False):
+        self.root = root
+        self.path = os.path.join(root, VAULT_MANIFEST_FILE)
+        self.use_hash = use_hash
+        self.previous = {}
+        self.files = {}
+        self.deleted = {}
+        self.compare = True  # False: carrega o manifesto só para mesclar (backup seletivo não incremental)
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Carrega o manifesto da execução anterior (se existir)"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.previous = data.get('files', {})
+            self.deleted = data.get('deleted', {})
+            return True
+        except Exception:
+            # Manifesto corrompido: trata como primeira execução
+            self.previous = {}
+            self.deleted = {}
+            return False
+
+    @staticmethod
+    def file_hash(path, chunk_size=1024 * 1024, algorithm='sha256'):
+        """Calcula o hash (SHA-256 por padrão; 'md5' para comparar com o Drive) em blocos"""
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_hashes(path, algorithms=('sha256', 'md5'), chunk_size=1024 * 1024):
+        """Vários hashes na mesma leitura (ex.: nome do blob e MD5 para conferir com o Drive)"""
+        digests = [hashlib.new(algorithm) for algorithm in algorithms]
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                for digest in digests:
+                    digest.update(chunk)
+        return tuple(digest.hexdigest() for digest in digests)
+
+    def key(self, dst_path):
+        """Caminho relativo ao cofre, sempre com '/' como separador"""
+        return os.path.relpath(dst_path, self.root).replace(os.sep, '/')
+
+    def is_unchanged(self, src, dst, st):
+        """Verifica se o arquivo de origem é idêntico ao registrado na execução anterior"""
+        entry = self.previous.get(self.key(dst)) if self.compare else None
+        if not entry or not os.path.exists(dst):
+            return False
+        if entry.get('size') != st.st_size or entry.get('mtime') != st.st_mtime_ns:
+            return False
+        if self.use_hash and entry.get('hash'):
+            return entry['hash'] == self.file_hash(src)
+        return True
+
+    def keep(self, dst):
+        """Mantém a entrada anterior de um arquivo inalterado"""
+        key = self.key(dst)
+        with self.lock:
+            self.files[key] = self.previous[key]
+
+    def record(self, src, dst, st):
+        """Registra um arquivo copiado nesta execução"""
+        entry = {'size': st.st_size, 'mtime': st.st_mtime_ns}
+        if self.use_hash:
+            entry['hash'] = self.file_hash(src)
+        key = self.key(dst)
+        with self.lock:
+            self.files[key] = entry
+            self.deleted.pop(key, None)
+
+    def finalize(self, complete=True):
+        """Registra exclusões e grava o manifesto; execuções interrompidas não marcam exclusões"""
+        removed = [k for k in self.previous if k not in self.files]
+        if complete:
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            for key in removed:
+                self.deleted[key] = now
+        else:
+            for key in removed:
+                self.files[key] = self.previous[key]
+            removed = []
+
+        data = {
+            'version': self.VERSION,
+            'updated': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'hash': self.use_hash,
+            'files': self.files,
+            'deleted': self.deleted
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
+        return removed
+
+# --- ÍNDICE POR JOGO (APPID) ---
+class AppIdIndex:
+    """Relaciona cada AppID aos seus arquivos nos quatro módulos do cofre.
+
+    userdata/<conta>/<appid>/..., config/stplug-in/<appid>.lua,
+    config/depotcache/<depot>_<manifest>.manifest (depots declarados no .lua do jogo)
+    e appcache/stats/UserGameStats[Schema]_[<conta>_]<appid>.bin.
+    """
+    LUA_DEPOT = re.compile(r'(?:addappid|setManifestid)\s*\(\s*(\d+)', re.IGNORECASE)
+    DEPOT_MANIFEST = re.compile(r'^(\d+)_\d+\.manifest$')
+    STATS_FILE = re.compile(r'^UserGameStats(?:Schema)?_(?:\d+_)?(\d+)\.bin$')
+
+    def __init__(self, appids=None, depots=None):
+        self.appids = appids or {}
+        self.depots = depots or {}
+
+    @classmethod
+    def depots_from_lua(cls, path):
+        """Lê os depots declarados em um .lua do SteamTools"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                return set(cls.LUA_DEPOT.findall(f.read()))
+        except OSError:
+            return set()
+
+    @classmethod
+    def appid_for(cls, key, depots):
+        """AppID de uma chave do cofre (caminho relativo com '/'), ou None"""
+        parts = key.split('/')
+        if parts[0] == 'userdata' and len(parts) > 3 and parts[2].isdigit():
+            return parts[2]
+        if parts[:2] == ['config', 'stplug-in'] and len(parts) == 3 and parts[2].endswith('.lua'):
+            name = parts[2][:-4]
+            return name if name.isdigit() else None
+        if parts[:2] == ['config', 'depotcache'] and len(parts) == 3:
+            match = cls.DEPOT_MANIFEST.match(parts[2])
+            # Depot sem .lua que o declare não vira um AppID "fantasma"
+            return depots.get(match.group(1)) if match else None
+        if parts[:2] == ['appcache', 'stats'] and len(parts) == 3:
+            match = cls.STATS_FILE.match(parts[2])
+            return match.group(1) if match else None
+        return None
+
+    @classmethod
+    def from_keys(cls, keys, root):
+        """Monta o índice a partir das chaves já conhecidas (ex.: manifesto), lendo só os .lua"""
+        keys = list(keys)
+        depots = {}
+        for key in keys:
+            appid = cls.appid_for(key, {}) if key.startswith('config/stplug-in/') else None
+            if appid:
+                for depot in cls.depots_from_lua(os.path.join(root, *key.split('/'))):
+                    depots[depot] = appid
+        appids = {}
+        for key in sorted(keys):
+            appid = cls.appid_for(key, depots)
+            if appid:
+                appids.setdefault(appid, []).append(key)
+        return cls(appids, depots)
+
+    @classmethod
+    def iter_files(cls, root, appids):
+        """Gera (caminho, chave, stat) só dos arquivos das AppIDs pedidas, sem varrer a árvore toda"""
+        appids = {str(a) for a in appids}
+        userdata = os.path.join(root, "userdata")
+        if os.path.isdir(userdata):
+            for account in sorted(os.listdir(userdata)):
+                for appid in sorted(appids):
+                    app_dir = os.path.join(userdata, account, appid)
+                    if not os.path.isdir(app_dir):
+                        continue
+                    for path, rel, st in scan_tree(app_dir):
+                        if st is not None:
+                            yield path, '/'.join(['userdata', account, appid] + rel.split(os.sep)), st
+
+        depots = {}
+        for appid in sorted(appids):
+            lua = os.path.join(root, "config", "stplug-in", f"{appid}.lua")
+            if os.path.isfile(lua):
+                for depot in cls.depots_from_lua(lua):
+                    depots[depot] = appid
+                yield lua, f"config/stplug-in/{appid}.lua", os.stat(lua)
+
+        for rel_module in (("config", "depotcache"), ("appcache", "stats")):
+            module_dir = os.path.join(root, *rel_module)
+            if not os.path.isdir(module_dir):
+                continue
+            with os.scandir(module_dir) as it:
+                for entry in it:
+                    key = '/'.join(rel_module + (entry.name,))
+                    if entry.is_file() and cls.appid_for(key, depots) in appids:
+                        yield entry.path, key, entry.stat()
+
+    def keys_for(self, appids):
+        return [key for appid in appids for key in self.appids.get(str(appid), [])]
+
+    def save(self, root):
+        path = os.path.join(root, APPID_INDEX_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'appids': self.appids, 'depots': self.depots}, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, root):
+        path = os.path.join(root, APPID_INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('appids', {}), data.get('depots', {}))
+
+# --- SNAPSHOTS VERSIONADOS (ARMAZENAMENTO POR CONTEÚDO) ---
+class SnapshotStore:
+    """Snapshots com data/hora sobre um repositório de blobs endereçados pelo SHA-256.
+
+    objects/ab/abcdef... guarda cada conteúdo uma única vez; snapshots/<nome>.json
+    mapeia caminho relativo -> hash, tamanho e mtime.
+    """
+    VERSION = 1
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        self.trees_dir = os.path.join(root, "trees")  # snapshots completos com hardlinks
+
+    def ensure(self):
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    def list_snapshots(self):
+        """Nomes dos snapshots, do mais antigo para o mais recente"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(f[:-5] for f in os.listdir(self.snapshots_dir) if f.endswith('.json'))
+
+    def list_trees(self):
+        """Nomes dos snapshots em árvore (modo hardlink), do mais antigo para o mais recente"""
+        if not os.path.isdir(self.trees_dir):
+            return []
+        return sorted(d for d in os.listdir(self.trees_dir)
+                      if not d.endswith('.tmp') and os.path.isdir(os.path.join(self.trees_dir, d)))
+
+    def resolve(self, name=None):
+        """Resolve 'latest' (ou None) para o snapshot mais recente, de qualquer tipo"""
+        names = sorted(self.list_snapshots() + self.list_trees())
+        if not names:
+            return None
+        if not name or name == 'latest':
+            return names[-1]
+        return name if name in names else None
+
+    def is_tree(self, name):
+        return os.path.isdir(os.path.join(self.trees_dir, name))
+
+    def new_name(self):
+        name = time.strftime("%Y%m%d_%H%M%S")
+        suffix = 1
+        while (os.path.exists(os.path.join(self.snapshots_dir, name + '.json'))
+               or os.path.exists(os.path.join(self.trees_dir, name))):
+            suffix += 1
+            name = f"{time.strftime('%Y%m%d_%H%M%S')}_{suffix}"
+        return name
+
+    def prune_trees(self, keep):
+        """Remove as árvores além das 'keep' mais recentes (dados compartilhados por hardlink continuam nas demais)"""
+        names = self.list_trees()
+        removed = names[:-keep] if keep and len(names) > keep else []
+        for name in removed:
+            shutil.rmtree(os.path.join(self.trees_dir, name), ignore_errors=True)
+        return removed
+
+    def remove_partial_trees(self):
+        """Remove árvores <nome>.tmp deixadas por snapshots interrompidos (queda, kill)"""
+        if not os.path.isdir(self.trees_dir):
+            return []
+        partial = sorted(d for d in os.listdir(self.trees_dir) if d.endswith('.tmp'))
+        for name in partial:
+            shutil.rmtree(os.path.join(self.trees_dir, name), ignore_errors=True)
+        return partial
+
+    def load(self, name):
+        with open(os.path.join(self.snapshots_dir, name + '.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has_blob(self, digest):
+        return os.path.exists(self.blob_path(digest))
+
+    def add_blob(self, src):
+        """Grava o conteúdo no repositório; retorna (hash, tamanho) do que foi realmente gravado.
+
+        O SHA-256 é calculado durante a própria cópia para um temporário, renomeado para o
+        hash no final: um arquivo alterado no meio do caminho nunca fica sob o hash errado.
+        """
+        tmp_path = os.path.join(self.objects_dir, f"incoming.{os.getpid()}.{threading.get_ident()}.tmp")
+        h = hashlib.sha256()
+        size = 0
+        try:
+            with open(src, 'rb') as fsrc, open(tmp_path, 'wb') as fdst:
+                for chunk in iter(lambda: fsrc.read(COPY_BUFFER_SIZE), b''):
+                    h.update(chunk)
+                    fdst.write(chunk)
+                    size += len(chunk)
+            digest = h.hexdigest()
+            path = self.blob_path(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def write_snapshot(self, files, steam=""):
+        """Grava o manifesto do snapshot e retorna seu nome"""
+        self.ensure()
+        name = self.new_name()
+        data = {
+            'version': self.VERSION,
+            'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'steam': steam,
+            'files': files
+        }
+        path = os.path.join(self.snapshots_dir, name + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(path + '.tmp', path)
+        return name
+
+    def prune(self, keep):
+        """Remove snapshots além dos 'keep' mais recentes e blobs não referenciados"""
+        names = self.list_snapshots()
+        removed = names[:-keep] if keep and len(names) > keep else []
+        for name in removed:
+            os.remove(os.path.join(self.snapshots_dir, name + '.json'))
+
+        referenced = set()
+        for name in self.list_snapshots():
+            referenced.update(entry['hash'] for entry in self.load(name)['files'].values())
+
+        freed = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                if prefix.endswith('.tmp'):
+                    os.remove(prefix_dir)  # cópia interrompida de add_blob
+                continue
+            for blob in os.listdir(prefix_dir):
+                if blob not in referenced:
+                    blob_file = os.path.join(prefix_dir, blob)
+                    freed += os.path.getsize(blob_file)
+                    os.remove(blob_file)
+        return removed, freed
+
+# --- ARQUIVO ÚNICO COM ÍNDICE (.svault) ---
+class VaultArchive:
+    """Contêiner de arquivo único: blocos comprimidos por arquivo seguidos de um índice no final.
+
+    Layout: cabeçalho (magic + codec), dados de cada arquivo comprimidos individualmente,
+    índice JSON comprimido e rodapé fixo (magic, offset e tamanho do índice). O índice
+    permite extrair um módulo ou um único arquivo sem ler o contêiner inteiro.
+    """
+    MAGIC = b"SVAULT01"
+    FOOTER_MAGIC = b"SVIDX001"
+    FOOTER = struct.Struct("<8sQQ")
+    CODECS = {"zlib": b"Z", "lzma": b"X"}
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def _compressor(codec):
+        return lzma.LZMACompressor() if codec == "lzma" else zlib.compressobj(6)
+
+    @staticmethod
+    def _decompressor(codec):
+        return lzma.LZMADecompressor() if codec == "lzma" else zlib.decompressobj()
+
+    def write(self, entries, codec="zlib", should_continue=None, on_error=None):
+        """Grava o contêiner a partir de (caminho, chave, stat); retorna o índice ou None se interrompido.
+
+        Com on_error(chave, erro), um arquivo ilegível (ex.: save bloqueado pela Steam) fica
+        fora do índice e a gravação continua; sem ele, o erro interrompe a gravação.
+        """
+        if codec not in self.CODECS:
+            raise ValueError(f"Codec desconhecido: {codec}")
+        index = {}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as out:
+                out.write(self.MAGIC + self.CODECS[codec])
+                for path, key, st in entries:
+                    if should_continue and not should_continue():
+                        raise InterruptedError
+                    offset = out.tell()
+                    comp = self._compressor(codec)
+                    size = 0
+                    try:
+                        f = open(path, 'rb')
+                    except OSError as e:
+                        if on_error is None:
+                            raise
+                        on_error(key, e)
+                        continue
+                    with f:
+                        while True:
+                            try:
+                                chunk = f.read(self.CHUNK_SIZE)
+                            except OSError as e:
+                                if on_error is None:
+                                    raise
+                                # Descarta o que já foi gravado desta entrada
+                                out.seek(offset)
+                                out.truncate()
+                                on_error(key, e)
+                                size = None
+                                break
+                            if not chunk:
+                                break
+                            size += len(chunk)
+                            out.write(comp.compress(chunk))
+                    if size is None:
+                        continue
+                    out.write(comp.flush())
+                    # Tamanho realmente lido (o arquivo pode ter mudado desde o stat)
+                    index[key] = [offset, out.tell() - offset, size, st.st_mtime_ns]
+
+                index_offset = out.tell()
+                payload = zlib.compress(json.dumps({'codec': codec, 'files': index}).encode('utf-8'))
+                out.write(payload)
+                out.write(self.FOOTER.pack(self.FOOTER_MAGIC, index_offset, len(payload)))
+            os.replace(tmp_path, self.path)
+            return index
+        except InterruptedError:
+            os.remove(tmp_path)
+            return None
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read_index(self):
+        """Lê apenas o rodapé e o índice"""
+        with open(self.path, 'rb') as f:
+            if f.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError("Arquivo .svault inválido")
+            f.seek(-self.FOOTER.size, os.SEEK_END)
+            magic, index_offset, index_len = self.FOOTER.unpack(f.read(self.FOOTER.size))
+            if magic != self.FOOTER_MAGIC:
+                raise ValueError("Índice do .svault ausente ou corrompido")
+            f.seek(index_offset)
+            return json.loads(zlib.decompress(f.read(index_len)).decode('utf-8'))
+
+    @staticmethod
+    def select(keys, only=None):
+        """Filtra chaves por módulo (prefixo de diretório) ou por caminho exato"""
+        if not only:
+            return list(keys)
+        prefixes = [o.replace(os.sep, '/').strip('/') for o in only]
+        return [k for k in keys if any(k == p or k.startswith(p + '/') for p in prefixes)]
+
+    def extract(self, dest, only=None, should_continue=None):
+        """Extrai os arquivos selecionados para dest; gera (chave, sucesso, erro)"""
+        index = self.read_index()
+        codec, files = index['codec'], index['files']
+        # Lê na ordem do contêiner para manter o acesso sequencial no disco
+        keys = sorted(self.select(files, only), key=lambda k: files[k][0])
+        with open(self.path, 'rb') as f:
+            for key in keys:
+                if should_continue and not should_continue():
+                    return
+                offset, length, size, mtime = files[key]
+                dst = os.path.join(dest, *key.split('/'))
+                tmp_path = dst + ".svtmp"
+                try:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    f.seek(offset)
+                    decomp = self._decompressor(codec)
+                    remaining, written = length, 0
+                    with open(tmp_path, 'wb') as out:
+                        while remaining:
+                            chunk = f.read(min(self.CHUNK_SIZE, remaining))
+                            if not chunk:
+                                raise EOFError("Contêiner truncado")
+                            remaining -= len(chunk)
+                            data = decomp.decompress(chunk)
+                            written += len(data)
+                            out.write(data)
+                        # zlib pode reter dados até o flush; o LZMA não tem flush
+                        data = decomp.flush() if hasattr(decomp, 'flush') else b''
+                        written += len(data)
+                        out.write(data)
+                    if not decomp.eof:
+                        raise EOFError("Bloco comprimido incompleto")
+                    if written != size:
+                        raise ValueError(f"Tamanho incorreto: {written} bytes, esperado {size}")
+                    os.utime(tmp_path, ns=(mtime, mtime))
+                    os.replace(tmp_path, dst)
+                    yield key, True, None
+                except Exception as e:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    yield key, False, e
+
+# --- JOURNAL DE UPLOADS RETOMÁVEIS ---
+class UploadJournal:
+    """Sessões de upload retomável em andamento, persistidas em disco após cada bloco.
+
+    Cada entrada (chave: caminho local absoluto) guarda tamanho e mtime do arquivo, a URI
+    da sessão, o offset confirmado, o tamanho do bloco e a pasta de destino, para que uma
+    execução seguinte continue o envio de onde parou em vez de recomeçar do zero.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = None
+
+    def _load(self):
+        if self.entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+            # Descarta sessões expiradas e de arquivos que não existem mais (ex.: pacotes temporários)
+            now = time.time()
+            self.entries = {path: entry for path, entry in entries.items()
+                            if now - entry.get('updated', 0) <= GDRIVE_SESSION_MAX_AGE and os.path.exists(path)}
+            if len(self.entries) != len(entries):
+                try:
+                    self._save()
+                except OSError:
+                    pass
+        return self.entries
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, local_path, st):
+        """Sessão pendente para este arquivo, se o conteúdo não mudou e a sessão não expirou"""
+        with self.lock:
+            entry = self._load().get(os.path.abspath(local_path))
+        if not entry:
+            return None
+        if (entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns
+                or time.time() - entry.get('updated', 0) > GDRIVE_SESSION_MAX_AGE):
+            self.discard(local_path)
+            return None
+        return entry
+
+    def record(self, local_path, st, uri, offset, chunk_size, parent_id):
+        with self.lock:
+            self._load()[os.path.abspath(local_path)] = {
+                'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'uri': uri, 'offset': offset,
+                'chunk_size': chunk_size, 'parent': parent_id, 'updated': time.time()}
+            self._save()
+
+    def discard(self, local_path):
+        with self.lock:
+            if self._load().pop(os.path.abspath(local_path), None) is not None:
+                self._save()
+
 # --- GERENCIADOR DE CONFIG ---
 class ConfigManager:
     @staticmethod
@@ -595,14 +2325,29 @@ class VaultEngine:
         self.log = logger_callback
         self.running = True
         self.gdrive_service = None
+        self.gdrive_backend = None  # ex.: OfflineDrive() para testes e benchmark sem rede
+        self.api_stats = ApiStats()  # chamadas ao Drive e operações por arquivo da última execução
+        self.jobs = DEFAULT_CONFIG['copy_jobs']
+        self.config = dict(DEFAULT_CONFIG)
+        self.reflink_supported = True  # desativado após a primeira falha de reflink
+        self.copy_strategies = {}  # estratégia -> quantidade de arquivos copiados
+        self.stats_lock = threading.Lock()
         
     def stop(self):
         self.running = False
+
+    def apply_config(self, config):
+        """Aplica a configuração salva (paralelismo local e opções do Google Drive)"""
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.jobs = self.config.get('copy_jobs') or 1
+        if self.gdrive_service:
+            self.gdrive_service.configure(self.config)
     
     def init_gdrive(self):
         """Inicializa o serviço do Google Drive"""
         if GOOGLE_DRIVE_AVAILABLE:
-            self.gdrive_service = GoogleDriveService(self.log)
+            self.gdrive_service = GoogleDriveService(self.log, engine=self, backend=self.gdrive_backend)
+            self.gdrive_service.configure(self.config)
             return self.gdrive_service is not None
         else:
             self.log("[ERRO] Google Drive não disponível - dependências ausentes")
@@ -634,58 +2379,517 @@ class VaultEngine:
             try: os.makedirs(path)
             except: pass
 
-    def safe_copy(self, src, dst):
+    def safe_copy(self, src, dst, st=None, try_reflink=False):
         try:
-            shutil.copy2(src, dst)
-            return True
+            strategy = fast_copy(src, dst, st if st is not None else os.stat(src), try_reflink)
+            with self.stats_lock:
+                self.copy_strategies[strategy] = self.copy_strategies.get(strategy, 0) + 1
+            return strategy
         except Exception as e:
             self.log(f"[ERRO] Falha: {os.path.basename(src)} - {e}")
         return False
 
-    def copy_module(self, src, dst, title):
+    def log_copy_strategies(self, title, before):
+        """Mostra quantos arquivos cada estratégia de cópia tratou desde 'before'"""
+        with self.stats_lock:
+            delta = {k: v - before.get(k, 0) for k, v in self.copy_strategies.items() if v - before.get(k, 0)}
+        if delta:
+            self.log(f"[COPIA] {title}: " + ", ".join(f"{k}={v}" for k, v in sorted(delta.items())))
+
+    def copy_file(self, src, dst, manifest=None, st=None):
+        """Copia um arquivo consultando o manifesto; retorna 'copied', 'skipped' ou 'failed'"""
+        if manifest is None:
+            return 'copied' if self.safe_copy(src, dst, st) else 'failed'
+        try:
+            if st is None:
+                st = os.stat(src)
+            if manifest.is_unchanged(src, dst, st):
+                manifest.keep(dst)
+                return 'skipped'
+            if not self.safe_copy(src, dst, st):
+                return 'failed'
+            manifest.record(src, dst, st)
+            return 'copied'
+        except OSError as e:
+            self.log(f"[ERRO] Falha: {os.path.basename(src)} - {e}")
+            return 'failed'
+
+    def restore_file(self, src, dst, st=None, use_hash=False):
+        """Restauração diferencial: grava apenas se o destino não existir ou for diferente.
+
+        Retorna 'created', 'updated', 'skipped' ou 'failed'. Tamanho e mtime iguais bastam
+        para pular; com use_hash, arquivos de mesmo tamanho são sempre comparados pelo
+        conteúdo (o mtime pode coincidir mesmo com bytes diferentes, ou ter se perdido no download).
+        """
+        try:
+            if st is None:
+                st = os.stat(src)
+            try:
+                dst_st = os.stat(dst)
+            except FileNotFoundError:
+                return 'created' if self.safe_copy(src, dst, st) else 'failed'
+
+            if dst_st.st_size == st.st_size:
+                if use_hash:
+                    if VaultManifest.file_hash(src) == VaultManifest.file_hash(dst):
+                        return 'skipped'
+                elif abs(dst_st.st_mtime_ns - st.st_mtime_ns) <= MTIME_TOLERANCE_NS:
+                    return 'skipped'
+            return 'updated' if self.safe_copy(src, dst, st) else 'failed'
+        except OSError as e:
+            self.log(f"[ERRO] Falha: {os.path.basename(src)} - {e}")
+            return 'failed'
+
+    def link_file(self, src, dst, prev, st):
+        """Modo snapshot: hardlink contra o snapshot anterior se inalterado; senão clona/copia"""
+        try:
+            try:
+                prev_st = os.stat(prev) if prev else None
+            except FileNotFoundError:
+                prev_st = None
+            if prev_st and prev_st.st_size == st.st_size and prev_st.st_mtime_ns == st.st_mtime_ns:
+                try:
+                    os.link(prev, dst)
+                    return 'linked'
+                except OSError:
+                    pass  # sistema de arquivos sem hardlink (FAT/exFAT): cai para cópia
+            try_reflink = self.reflink_supported and st.st_size > SMALL_FILE_THRESHOLD
+            strategy = self.safe_copy(src, dst, st, try_reflink)
+            if not strategy:
+                return 'failed'
+            if strategy == 'reflink':
+                return 'cloned'
+            if try_reflink:
+                self.reflink_supported = False
+            return 'copied'
+        except OSError as e:
+            self.log(f"[ERRO] Falha: {os.path.basename(src)} - {e}")
+            return 'failed'
+
+    def run_parallel(self, tasks, func, counts):
+        """Executa as tarefas no pool limitado do motor (self.jobs), respeitando a interrupção"""
+        return run_bounded(tasks, func, counts, max(1, int(self.jobs or 1)), lambda: self.running)
+
+    def copy_module(self, src, dst, title, manifest=None, differential=False, use_hash=False, link_dest=None):
         if not os.path.exists(src):
             self.log(f"[INFO] {title}: Não localizado (Ignorado).")
-            return
+            return None
 
-        total = sum([len(files) for r, d, files in os.walk(src)])
-        if total == 0: return
+        if differential:
+            counts = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        elif link_dest is not None:
+            counts = {'linked': 0, 'cloned': 0, 'copied': 0, 'failed': 0}
+        else:
+            counts = {'copied': 0, 'skipped': 0, 'failed': 0}
+        state = {'found': 0}
 
-        self.log(f">>> PROCESSANDO: {title}...")
-        self.safe_create_dir(dst)
+        def on_error(path, e):
+            self.log(f"[ERRO] Falha ao ler: {path} - {e}")
 
-        for root, dirs, files in os.walk(src):
-            if not self.running: break
-            rel = os.path.relpath(root, src)
-            target_dir = os.path.join(dst, rel)
-            self.safe_create_dir(target_dir)
+        def tasks():
+            empty_dirs = []  # diretórios vistos antes do primeiro arquivo (módulo vazio não cria nada)
+            last_progress = time.monotonic()
+            for path, rel, st in scan_tree(src, on_error):
+                target = os.path.join(dst, rel) if rel else dst
+                if st is None:
+                    if state['found']: self.safe_create_dir(target)
+                    else: empty_dirs.append(target)
+                    continue
 
-            for file in files:
-                if not self.running: break
-                self.safe_copy(os.path.join(root, file), os.path.join(target_dir, file))
-        
-        self.log(f"[SUCESSO] {title} arquivado no cofre.")
+                state['found'] += 1
+                if state['found'] == 1:
+                    self.log(f">>> PROCESSANDO: {title}...")
+                    for d in empty_dirs: self.safe_create_dir(d)
+                    empty_dirs = []
+
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    self.log(f"[PROGRESSO] {title}: {sum(counts.values())}/{state['found']} arquivos (varredura em andamento)")
+                if differential:
+                    yield path, target, st, use_hash
+                elif link_dest is not None:
+                    yield path, target, os.path.join(link_dest, rel) if link_dest else None, st
+                else:
+                    yield path, target, manifest, st
 
-    def run_backup(self, steam, backup_root):
+        if differential:
+            func = self.restore_file
+        elif link_dest is not None:
+            func = self.link_file
+        else:
+            func = self.copy_file
+        before = dict(self.copy_strategies)
+        self.run_parallel(tasks(), func, counts)
+        self.log_copy_strategies(title, before)
+
+        found = state['found']
+        if found == 0: return counts
+        if counts['failed']:
+            self.log(f"[AVISO] {title}: {counts['failed']} arquivos falharam.")
+        if manifest is not None and manifest.previous:
+            self.log(f"[INCREMENTAL] {title}: {counts['copied']} copiados, {counts['skipped']} inalterados.")
+        if link_dest is not None:
+            self.log(f"[LINK] {title}: {counts['linked']} vinculados (hardlink), {counts['cloned']} clonados (reflink), {counts['copied']} copiados.")
+        if differential:
+            self.log(f"[DIFERENCIAL] {title}: {counts['created']} criados, {counts['updated']} atualizados, {counts['skipped']} inalterados.")
+        self.log(f"[SUCESSO] {title} arquivado no cofre ({found} arquivos).")
+        return counts
+
+    def run_backup(self, steam, backup_root, incremental=False, use_hash=False, archive=False, codec="zlib", appids=None):
+        if archive:
+            return self.run_archive_backup(steam, backup_root, codec)
         vault_folder = os.path.join(backup_root, "SteamVault_Backup")
         self.log(f"--- INICIANDO PROTOCOLO {APP_NAME} ---")
         self.safe_create_dir(vault_folder)
-        
-        self.copy_module(os.path.join(steam, "userdata"), os.path.join(vault_folder, "userdata"), "USERDATA")
-        self.copy_module(os.path.join(steam, "config", "stplug-in"), os.path.join(vault_folder, "config", "stplug-in"), "STPLUG-IN")
-        self.copy_module(os.path.join(steam, "config", "depotcache"), os.path.join(vault_folder, "config", "depotcache"), "DEPOTCACHE")
-        self.copy_module(os.path.join(steam, "appcache", "stats"), os.path.join(vault_folder, "appcache", "stats"), "STATS")
 
-        for dll in ["version.dll", "winmm.dll"]:
+        # O manifesto é sempre gravado para servir de base ao próximo backup incremental
+        manifest = VaultManifest(vault_folder, use_hash)
+        if incremental:
+            if manifest.load():
+                self.log(f"[INCREMENTAL] Manifesto anterior carregado ({len(manifest.previous)} arquivos).")
+            else:
+                self.log("[INCREMENTAL] Nenhum manifesto anterior. Executando backup completo.")
+        elif appids:
+            # Backup seletivo preserva as entradas dos demais jogos no manifesto
+            manifest.load()
+            manifest.compare = False
+
+        if appids:
+            self.backup_appids(steam, vault_folder, appids, manifest)
+        else:
+            self.copy_module(os.path.join(steam, "userdata"), os.path.join(vault_folder, "userdata"), "USERDATA", manifest)
+            self.copy_module(os.path.join(steam, "config", "stplug-in"), os.path.join(vault_folder, "config", "stplug-in"), "STPLUG-IN", manifest)
+            self.copy_module(os.path.join(steam, "config", "depotcache"), os.path.join(vault_folder, "config", "depotcache"), "DEPOTCACHE", manifest)
+            self.copy_module(os.path.join(steam, "appcache", "stats"), os.path.join(vault_folder, "appcache", "stats"), "STATS", manifest)
+
+            for dll in ["version.dll", "winmm.dll"]:
+                src = os.path.join(steam, dll)
+                if os.path.exists(src):
+                    if self.copy_file(src, os.path.join(vault_folder, dll), manifest) != 'failed':
+                        self.log(f"[DLL] {dll} Protegida.")
+
+        try:
+            removed = manifest.finalize(complete=self.running and not appids)
+            if removed:
+                self.log(f"[INCREMENTAL] {len(removed)} arquivos removidos da origem registrados no manifesto.")
+            index = AppIdIndex.from_keys(manifest.files, vault_folder)
+            index.save(vault_folder)
+            self.log(f"[INFO] Índice de AppIDs atualizado ({len(index.appids)} jogos).")
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao gravar manifesto: {e}")
+
+    def backup_appids(self, steam, vault_folder, appids, manifest):
+        """Copia apenas os arquivos das AppIDs informadas nos quatro módulos"""
+        self.log(f">>> PROCESSANDO: AppIDs {', '.join(map(str, appids))}...")
+        counts = {'copied': 0, 'skipped': 0, 'failed': 0}
+
+        def tasks():
+            for path, key, st in AppIdIndex.iter_files(steam, appids):
+                dst = os.path.join(vault_folder, *key.split('/'))
+                self.safe_create_dir(os.path.dirname(dst))
+                yield path, dst, manifest, st
+
+        self.run_parallel(tasks(), self.copy_file, counts)
+        if sum(counts.values()) == 0:
+            self.log("[AVISO] Nenhum arquivo encontrado para as AppIDs informadas.")
+        self.log(f"[SUCESSO] AppIDs arquivadas: {counts['copied']} copiados, {counts['skipped']} inalterados, {counts['failed']} falhas.")
+        return counts
+
+    def restore_appids(self, origin, steam, appids, differential=False, use_hash=False):
+        """Restaura apenas os arquivos das AppIDs informadas (usa o índice do cofre quando existir)"""
+        self.log(f">>> RESTAURANDO AppIDs {', '.join(map(str, appids))}...")
+        index = AppIdIndex.load(origin)
+        if index is not None:
+            entries = ((os.path.join(origin, *key.split('/')), key, None) for key in index.keys_for(appids))
+        else:
+            self.log("[AVISO] Índice de AppIDs ausente no cofre. Localizando arquivos diretamente.")
+            entries = AppIdIndex.iter_files(origin, appids)
+
+        counts = {'created': 0, 'updated': 0, 'copied': 0, 'skipped': 0, 'failed': 0}
+
+        def tasks():
+            for path, key, st in entries:
+                dst = os.path.join(steam, *key.split('/'))
+                self.safe_create_dir(os.path.dirname(dst))
+                if differential:
+                    yield self.restore_file, (path, dst, st, use_hash)
+                else:
+                    yield self.copy_file, (path, dst, None, st)
+
+        self.run_parallel(tasks(), lambda func, args: func(*args), counts)
+        if sum(counts.values()) == 0:
+            self.log("[AVISO] Nenhum arquivo encontrado no cofre para as AppIDs informadas.")
+        if differential:
+            self.log_restore_summary([counts])
+        else:
+            self.log(f"[SUCESSO] AppIDs restauradas: {counts['copied']} arquivos, {counts['failed']} falhas.")
+        return counts
+
+    def iter_steam_files(self, steam, on_error=None):
+        """Gera (caminho, chave, stat) para todos os arquivos dos módulos e DLLs do Steam.
+
+        Diretórios ou entradas ilegíveis vão para on_error(caminho, erro) (padrão: log).
+        """
+        if on_error is None:
+            on_error = lambda path, e: self.log(f"[ERRO] Falha ao ler: {path} - {e}")
+        for title, rel_module in VAULT_MODULES:
+            src = os.path.join(steam, rel_module)
+            if not os.path.exists(src):
+                self.log(f"[INFO] {title}: Não localizado (Ignorado).")
+                continue
+            self.log(f">>> PROCESSANDO: {title}...")
+            for path, rel, st in scan_tree(src, on_error):
+                if st is not None:
+                    yield path, os.path.join(rel_module, rel).replace(os.sep, '/'), st
+        for dll in VAULT_DLLS:
+            path = os.path.join(steam, dll)
+            if os.path.isfile(path):
+                yield path, dll, os.stat(path)
+
+    def run_snapshot_backup(self, steam, backup_root, keep=None):
+        """Cria um snapshot versionado; só conteúdos novos são gravados no repositório de blobs"""
+        store = SnapshotStore(os.path.join(backup_root, SNAPSHOT_FOLDER))
+        store.ensure()
+        self.log(f"--- INICIANDO SNAPSHOT {APP_NAME} ---")
+
+        # Reaproveita o hash do snapshot anterior quando tamanho e mtime não mudaram
+        latest = store.resolve('latest')
+        previous = store.load(latest)['files'] if latest else {}
+        if latest:
+            self.log(f"[SNAPSHOT] Base: {latest} ({len(previous)} arquivos).")
+
+        files = {}
+        lock = threading.Lock()
+        counts = {'reused': 0, 'deduped': 0, 'stored': 0, 'failed': 0}
+
+        def store_file(path, key, st):
+            try:
+                entry = previous.get(key)
+                size = st.st_size
+                if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns and store.has_blob(entry['hash']):
+                    result, digest = 'reused', entry['hash']
+                else:
+                    # Conteúdo já no repositório: o blob existente corresponde ao hash lido
+                    digest = VaultManifest.file_hash(path)
+                    if store.has_blob(digest):
+                        result = 'deduped'
+                    else:
+                        # O hash do blob é o da cópia (o arquivo pode ter mudado desde a leitura)
+                        digest, size = store.add_blob(path)
+                        result = 'stored'
+                with lock:
+                    files[key] = {'hash': digest, 'size': size, 'mtime': st.st_mtime_ns}
+                return result
+            except OSError as e:
+                self.log(f"[ERRO] Falha: {os.path.basename(path)} - {e}")
+                return 'failed'
+
+        def on_error(path, e):
+            # Diretório ilegível: o snapshot fica incompleto, então conta como falha
+            counts['failed'] += 1
+            self.log(f"[ERRO] Falha ao ler: {path} - {e}")
+
+        self.run_parallel(self.iter_steam_files(steam, on_error), store_file, counts)
+
+        if not self.running:
+            self.log("[INFO] Snapshot interrompido. Nenhum manifesto gravado.")
+            return None
+
+        name = store.write_snapshot(files, steam)
+        self.log(f"[SNAPSHOT] {len(files)} arquivos: {counts['stored']} novos, "
+                 f"{counts['deduped'] + counts['reused']} já no cofre, {counts['failed']} falhas.")
+        if keep:
+            removed, freed = store.prune(keep)
+            if removed:
+                self.log(f"[SNAPSHOT] {len(removed)} snapshots antigos removidos ({freed / 1048576:.1f} MB liberados).")
+        self.log(f"[SUCESSO] Snapshot {name} criado.")
+        return name
+
+    def run_link_snapshot(self, steam, backup_root, keep=None):
+        """Snapshot em árvore completa: arquivos inalterados viram hardlinks do snapshot anterior"""
+        store = SnapshotStore(os.path.join(backup_root, SNAPSHOT_FOLDER))
+        os.makedirs(store.trees_dir, exist_ok=True)
+        partial = store.remove_partial_trees()
+        if partial:
+            self.log(f"[LINK] {len(partial)} snapshots incompletos removidos.")
+        trees = store.list_trees()
+        previous = os.path.join(store.trees_dir, trees[-1]) if trees else None
+        name = store.new_name()
+        # Grava em <nome>.tmp e renomeia no final: snapshot interrompido nunca vira base
+        target = os.path.join(store.trees_dir, name + ".tmp")
+        self.log(f"--- INICIANDO SNAPSHOT {APP_NAME} (HARDLINK) ---")
+        if previous:
+            self.log(f"[LINK] Base: {trees[-1]}.")
+
+        for title, rel_module in VAULT_MODULES:
+            self.copy_module(os.path.join(steam, rel_module), os.path.join(target, rel_module), title,
+                             link_dest=os.path.join(previous, rel_module) if previous else "")
+        for dll in VAULT_DLLS:
             src = os.path.join(steam, dll)
-            if os.path.exists(src):
-                if self.safe_copy(src, os.path.join(vault_folder, dll)):
+            if os.path.isfile(src):
+                self.safe_create_dir(target)
+                prev = os.path.join(previous, dll) if previous else None
+                if self.link_file(src, os.path.join(target, dll), prev, os.stat(src)) != 'failed':
                     self.log(f"[DLL] {dll} Protegida.")
 
-    def run_backup_gdrive(self, steam):
-        """Executa backup diretamente para Google Drive com verificação de interrupção"""
+        if not self.running:
+            shutil.rmtree(target, ignore_errors=True)
+            self.log("[INFO] Snapshot interrompido. Nada foi gravado.")
+            return None
+        if not os.path.isdir(target):
+            self.log("[AVISO] Nenhum arquivo encontrado para o snapshot.")
+            return None
+        os.replace(target, os.path.join(store.trees_dir, name))
+        if keep:
+            removed = store.prune_trees(keep)
+            if removed:
+                self.log(f"[LINK] {len(removed)} snapshots antigos removidos.")
+        self.log(f"[SUCESSO] Snapshot {name} criado.")
+        return name
+
+    def run_snapshot_restore(self, steam, backup_root, name=None, differential=False, use_hash=False):
+        """Restaura um snapshot (padrão: o mais recente) a partir do repositório de blobs.
+
+        No diferencial arquivos com mesmo tamanho e mtime no destino não são regravados;
+        com use_hash, os de mesmo tamanho são comparados pelo SHA-256 do snapshot.
+        """
+        store = SnapshotStore(os.path.join(backup_root, SNAPSHOT_FOLDER))
+        resolved = store.resolve(name)
+        if not resolved:
+            self.log(f"[ERRO CRÍTICO] Snapshot '{name or 'latest'}' não encontrado em {store.root}.")
+            return False
+
+        self.log(f"--- RESTAURANDO SNAPSHOT {resolved} ---")
+        if store.is_tree(resolved):
+            self.restore_vault(os.path.join(store.trees_dir, resolved), steam, differential, use_hash)
+            return True
+        files = store.load(resolved)['files']
+        counts = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+
+        def restore_file(key, entry):
+            dst = os.path.join(steam, *key.split('/'))
+            try:
+                try:
+                    st = os.stat(dst)
+                except FileNotFoundError:
+                    st = None
+                if differential and st is not None and st.st_size == entry['size']:
+                    if use_hash:
+                        if VaultManifest.file_hash(dst) == entry['hash']:
+                            return 'skipped'
+                    elif abs(st.st_mtime_ns - entry['mtime']) <= MTIME_TOLERANCE_NS:
+                        return 'skipped'
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if not self.safe_copy(store.blob_path(entry['hash']), dst):
+                    return 'failed'
+                os.utime(dst, ns=(entry['mtime'], entry['mtime']))
+                return 'created' if st is None else 'updated'
+            except OSError as e:
+                self.log(f"[ERRO] Falha: {key} - {e}")
+                return 'failed'
+
+        self.run_parallel(iter(files.items()), restore_file, counts)
+        if differential:
+            self.log_restore_summary([counts])
+        restored = counts['created'] + counts['updated']
+        self.log(f"[SUCESSO] Snapshot {resolved} restaurado: {restored} arquivos, {counts['failed']} falhas.")
+        return counts['failed'] == 0
+
+    def run_archive_backup(self, steam, backup_root, codec="zlib"):
+        """Grava o backup em um único arquivo .svault com índice no final"""
+        archive = VaultArchive(os.path.join(backup_root, ARCHIVE_FILE))
+        self.log(f"--- INICIANDO PROTOCOLO {APP_NAME} (ARQUIVO ÚNICO, {codec}) ---")
+        failed = []
+
+        def on_error(key, error):
+            failed.append(key)
+            self.log(f"[ERRO] Falha: {key} - {error}")
+
+        try:
+            index = archive.write(self.iter_steam_files(steam), codec, lambda: self.running, on_error)
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao gravar {ARCHIVE_FILE}: {e}")
+            return False
+        if index is None:
+            self.log("[INFO] Backup em arquivo único interrompido. Arquivo anterior mantido.")
+            return False
+        total = sum(entry[2] for entry in index.values())
+        stored = os.path.getsize(archive.path)
+        self.log(f"[SUCESSO] {len(index)} arquivos ({total / 1048576:.1f} MB) gravados em {ARCHIVE_FILE} ({stored / 1048576:.1f} MB).")
+        if failed:
+            self.log(f"[AVISO] {len(failed)} arquivos ilegíveis ficaram fora do {ARCHIVE_FILE}.")
+        return not failed
+
+    def run_archive_restore(self, steam, backup_root, only=None, differential=False):
+        """Restaura de um .svault; 'only' limita a módulos (ex.: userdata) ou arquivos específicos.
+
+        No diferencial só são extraídos arquivos ausentes ou com tamanho/mtime diferentes do destino.
+        """
+        path = backup_root if backup_root.endswith('.svault') else os.path.join(backup_root, ARCHIVE_FILE)
+        if not os.path.exists(path):
+            self.log(f"[ERRO CRÍTICO] Arquivo {path} não encontrado.")
+            return False
+
+        self.log(f"--- INICIANDO RESTAURAÇÃO DO COFRE ({os.path.basename(path)}) ---")
+        archive = VaultArchive(path)
+        counts = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        try:
+            selection = only
+            existing = set()
+            if differential:
+                files = archive.read_index()['files']
+                selection = []
+                for key in archive.select(files, only):
+                    _, _, size, mtime = files[key]
+                    try:
+                        st = os.stat(os.path.join(steam, *key.split('/')))
+                    except OSError:
+                        selection.append(key)
+                        continue
+                    existing.add(key)
+                    if st.st_size == size and abs(st.st_mtime_ns - mtime) <= MTIME_TOLERANCE_NS:
+                        counts['skipped'] += 1
+                    else:
+                        selection.append(key)
+            # Seleção vazia no diferencial = tudo inalterado (vazia no extract seria "tudo")
+            results = archive.extract(steam, selection, lambda: self.running) if selection or not differential else []
+            for key, ok, error in results:
+                if ok:
+                    counts['updated' if key in existing else 'created'] += 1
+                else:
+                    counts['failed'] += 1
+                    self.log(f"[ERRO] Falha: {key} - {error}")
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao ler {os.path.basename(path)}: {e}")
+            return False
+        restored = counts['created'] + counts['updated']
+        if restored == 0 and counts['failed'] == 0 and counts['skipped'] == 0:
+            self.log("[AVISO] Nenhum arquivo corresponde à seleção.")
+        if differential:
+            self.log_restore_summary([counts])
+        self.log(f"[SUCESSO] {restored} arquivos restaurados, {counts['failed']} falhas.")
+        return counts['failed'] == 0
+
+    def run_backup_gdrive(self, steam, incremental=False, pack=False, blob_store=False):
+        """Executa backup diretamente para Google Drive com verificação de interrupção.
+
+        Com incremental=True só os arquivos alterados desde o backup anterior são enviados;
+        os demais são referenciados pelo manifesto (cloud_manifest.json) da nova pasta.
+        Com pack=True os arquivos pequenos vão em pacotes .svault (pasta bundles).
+        Com blob_store=True os conteúdos ficam uma única vez em blobs/ e o backup é só o manifesto.
+        """
         if not self.gdrive_service:
             if not self.init_gdrive():
                 return False
+        self.api_stats.reset()
+        self.gdrive_service.reset_file_cache()
+        try:
+            return self.backup_to_gdrive(steam, incremental, pack, blob_store)
+        finally:
+            self.report_api_stats("backup")
+
+    def backup_to_gdrive(self, steam, incremental=False, pack=False, blob_store=False):
+        """Corpo do backup para o Google Drive (ver run_backup_gdrive)"""
         
         # Verifica interrupção antes de começar
         if not self.running:
@@ -705,6 +2909,9 @@ class VaultEngine:
             self.log("[ERRO] Falha ao criar pasta principal no Google Drive")
             return False
         
+        # Uma listagem das subpastas da pasta principal (backups e blobs) preenche o cache
+        self.gdrive_service.prime_folder_cache(main_folder_id)
+
         # Verifica interrupção após criar pasta principal
         if not self.running:
             self.log("[INFO] Backup do Google Drive interrompido após criar pasta principal")
@@ -721,14 +2928,25 @@ class VaultEngine:
         if not self.running:
             self.log("[INFO] Backup do Google Drive interrompido após criar pasta de backup")
             return False
+
+        if blob_store:
+            if incremental or pack:
+                self.log("[INFO] Repositório de blobs: modos incremental e empacotado ignorados (os blobs já deduplicam)")
+            return self.run_blob_gdrive(steam, main_folder_id, backup_folder_id)
+        if incremental:
+            if pack:
+                self.log("[INFO] Backup incremental: empacotamento ignorado (apenas os arquivos alterados são enviados)")
+            return self.run_incremental_gdrive(steam, main_folder_id, backup_folder_id)
+        if pack:
+            return self.run_packed_gdrive(steam, backup_folder_id)
         
-        # Cria estrutura de pastas no Google Drive
-        userdata_folder_id = self.gdrive_service.create_folder("userdata", backup_folder_id)
-        config_folder_id = self.gdrive_service.create_folder("config", backup_folder_id)
-        stplugin_folder_id = self.gdrive_service.create_folder("stplug-in", config_folder_id)
-        depotcache_folder_id = self.gdrive_service.create_folder("depotcache", config_folder_id)
-        appcache_folder_id = self.gdrive_service.create_folder("appcache", backup_folder_id)
-        stats_folder_id = self.gdrive_service.create_folder("stats", appcache_folder_id)
+        # Cria estrutura de pastas no Google Drive (dois batches: um por nível)
+        skeleton = self.gdrive_service.ensure_folder_paths(backup_folder_id, [
+            "userdata", "config", "config/stplug-in", "config/depotcache", "appcache", "appcache/stats"])
+        userdata_folder_id = skeleton.get("userdata")
+        stplugin_folder_id = skeleton.get("config/stplug-in")
+        depotcache_folder_id = skeleton.get("config/depotcache")
+        stats_folder_id = skeleton.get("appcache/stats")
         
         # Verifica interrupção após criar estrutura
         if not self.running:
@@ -817,14 +3035,429 @@ class VaultEngine:
         self.log(f"[SUCESSO] Backup concluído no Google Drive (ID: {backup_folder_id})")
         return True
 
-    def run_restore_gdrive(self, steam, backup_id):
-        """Restaura backup do Google Drive"""
+    def bundle_key(self, rel):
+        """Agrupamento dos pacotes: por conta e AppID em userdata, por módulo nos demais"""
+        parts = rel.split('/')
+        if parts[0] == "userdata" and len(parts) > 3:
+            return '_'.join(parts[:3])
+        return '_'.join(parts[:-1]) or "root"
+
+    def run_packed_gdrive(self, steam, backup_folder_id):
+        """Backup empacotado: arquivos pequenos agrupados em .svault (um índice em cada), grandes avulsos"""
+        service = self.gdrive_service
+        threshold = self.config.get('gdrive_pack_threshold') or SMALL_FILE_THRESHOLD
+        bundle_size = self.config.get('gdrive_bundle_size') or DEFAULT_CONFIG['gdrive_bundle_size']
+        groups, large = {}, []
+        for path, rel, st in self.iter_steam_files(steam):
+            if not self.running:
+                break
+            if st.st_size <= threshold:
+                groups.setdefault(self.bundle_key(rel), []).append((path, rel, st))
+            else:
+                large.append((rel, path))
+
+        unreadable = []
+
+        def on_error(rel, error):
+            unreadable.append(rel)
+            self.log(f"[ERRO] Falha: {rel} - {error}")
+
+        work_dir = tempfile.mkdtemp(prefix="steamvault_bundles_")
+        try:
+            uploads = list(large)
+            packed = 0
+            for key, entries in sorted(groups.items()):
+                # Divide o grupo em pacotes de até bundle_size bytes (antes da compressão)
+                chunks, current, current_size = [], [], 0
+                for entry in entries:
+                    if current and current_size + entry[2].st_size > bundle_size:
+                        chunks.append(current)
+                        current, current_size = [], 0
+                    current.append(entry)
+                    current_size += entry[2].st_size
+                chunks.append(current)
+                for number, chunk in enumerate(chunks, 1):
+                    if not self.running:
+                        break
+                    name = f"{key}_{number}.svault"
+                    bundle_path = os.path.join(work_dir, name)
+                    try:
+                        index = VaultArchive(bundle_path).write(chunk, should_continue=lambda: self.running,
+                                                                on_error=on_error)
+                    except Exception as e:
+                        # Ex.: disco cheio na pasta temporária; não pode escapar do worker da GUI
+                        self.log(f"[ERRO] Falha ao gravar o pacote {name}: {e}")
+                        return False
+                    if index is None:
+                        break
+                    if not index:
+                        continue  # todos os arquivos do pacote estavam ilegíveis
+                    uploads.append((f"{GDRIVE_BUNDLE_FOLDER}/{name}", bundle_path))
+                    packed += len(index)
+
+            if not self.running:
+                self.log("[INFO] Backup do Google Drive interrompido durante o empacotamento")
+                return False
+            self.log(f">>> ENVIANDO {packed} ARQUIVOS PEQUENOS EM {len(uploads) - len(large)} PACOTES"
+                     f" E {len(large)} ARQUIVOS AVULSOS...")
+            uploaded = service.upload_files(backup_folder_id, uploads)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        if not self.running:
+            self.log("[INFO] Backup do Google Drive interrompido durante o envio")
+            return False
+        if len(uploaded) != len(uploads):
+            self.log(f"[ERRO] {len(uploads) - len(uploaded)} envios falharam no backup empacotado")
+            return False
+        if unreadable:
+            self.log(f"[ERRO] {len(unreadable)} arquivos ilegíveis ficaram fora dos pacotes")
+            return False
+        self.log(f"[SUCESSO] Backup concluído no Google Drive (ID: {backup_folder_id})")
+        return True
+
+    def restore_gdrive_bundle(self, item, steam, counts, differential=False):
+        """Baixa um pacote .svault e extrai os arquivos (no diferencial, só os diferentes do local)"""
+        fd, tmp_path = tempfile.mkstemp(suffix='.svault')
+        os.close(fd)
+        try:
+            if not self.gdrive_service.download_file(item['id'], tmp_path):
+                return 'failed'
+            archive = VaultArchive(tmp_path)
+            files = archive.read_index()['files']
+            existing, keys = set(), []
+            for key, (_, _, size, mtime) in files.items():
+                try:
+                    st = os.stat(os.path.join(steam, *key.split('/')))
+                except FileNotFoundError:
+                    keys.append(key)
+                    continue
+                existing.add(key)
+                if differential and st.st_size == size and abs(st.st_mtime_ns - mtime) <= MTIME_TOLERANCE_NS:
+                    with self.stats_lock:
+                        counts['skipped'] += 1
+                    continue
+                keys.append(key)
+            if not keys:
+                return 'done'
+            for key, ok, error in archive.extract(steam, keys, lambda: self.running):
+                result = ('updated' if key in existing else 'created') if ok else 'failed'
+                if not ok:
+                    self.log(f"[ERRO] Falha: {key} - {error}")
+                with self.stats_lock:
+                    counts[result] += 1
+            return 'done'
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao extrair pacote: {e}")
+            return 'failed'
+        finally:
+            os.remove(tmp_path)
+
+    def load_gdrive_manifest(self, backup_id):
+        """Lê o manifesto de um backup do Drive.
+
+        Backups completos (sem manifesto) são descritos pela própria listagem, com o
+        md5Checksum e o tamanho informados pelo Drive. Se o manifesto existe mas não pôde
+        ser lido, retorna None: a listagem não descreve backups incrementais ou de blobs.
+        """
+        service = self.gdrive_service
+        query = f"name='{service.quote(GDRIVE_MANIFEST_FILE)}' and '{backup_id}' in parents and trashed=false"
+        found = service.list_all(query, "id")
+        if found:
+            fd, tmp_path = tempfile.mkstemp(suffix='.json')
+            os.close(fd)
+            try:
+                if not service.download_file(found[0]['id'], tmp_path):
+                    self.log(f"[ERRO] Falha ao baixar o {GDRIVE_MANIFEST_FILE} do backup {backup_id}")
+                    return None
+                with open(tmp_path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if not isinstance(manifest, dict) or not isinstance(manifest.get('files'), dict):
+                    raise ValueError("campo 'files' ausente")
+                return manifest
+            except (OSError, ValueError) as e:
+                self.log(f"[ERRO] {GDRIVE_MANIFEST_FILE} do backup {backup_id} ilegível: {e}")
+                return None
+            finally:
+                os.remove(tmp_path)
+        files = {}
+        for rel, item in service.list_tree(backup_id)[1]:
+            files[rel] = {'id': item['id'], 'size': int(item.get('size') or -1), 'md5': item.get('md5Checksum')}
+        return {'files': files}
+
+    def gdrive_backup_files(self, backup_id):
+        """Arquivos de um backup do Drive como [(relativo, item)], resolvendo as referências do manifesto.
+
+        None se o manifesto do backup não pôde ser lido.
+        """
+        manifest = self.load_gdrive_manifest(backup_id)
+        if manifest is None:
+            return None
+        files = manifest['files']
+        return [(rel, {'id': entry['id'], 'size': entry.get('size', -1), 'md5Checksum': entry.get('md5')})
+                for rel, entry in files.items()]
+
+    def previous_gdrive_backup(self, main_folder_id, exclude_id=None):
+        """Backup mais recente na pasta principal (ignorando a área de blobs e o backup atual)"""
+        query = f"'{main_folder_id}' in parents and mimeType='{FOLDER_MIME}' and trashed=false"
+        previous = [b for b in self.gdrive_service.list_all(query, "id, name, createdTime")
+                    if b['id'] != exclude_id and b['name'] != GDRIVE_BLOB_FOLDER]
+        return max(previous, key=lambda b: b.get('createdTime', '')) if previous else None
+
+    def previous_gdrive_files(self, base):
+        """Arquivos do backup anterior; manifesto ilegível equivale a não ter base (tudo é comparado de novo)"""
+        if not base:
+            return {}
+        manifest = self.load_gdrive_manifest(base['id'])
+        if manifest is None:
+            self.log(f"[AVISO] Manifesto de {base['name']} ilegível; todos os arquivos serão tratados como novos")
+            return {}
+        return manifest['files']
+
+    def write_gdrive_manifest(self, backup_folder_id, manifest):
+        """Grava o cloud_manifest.json na pasta do backup"""
+        fd, tmp_path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            if not self.gdrive_service.upload_file(tmp_path, backup_folder_id, filename=GDRIVE_MANIFEST_FILE):
+                self.log("[ERRO] Falha ao gravar o manifesto do backup no Google Drive")
+                return False
+            return True
+        finally:
+            os.remove(tmp_path)
+
+    def run_blob_gdrive(self, steam, main_folder_id, backup_folder_id):
+        """Backup sobre o repositório de blobs: conteúdos únicos em blobs/<sha256>, backup = manifesto"""
+        service = self.gdrive_service
+        blobs_id = service.ensure_folder_exists(GDRIVE_BLOB_FOLDER, main_folder_id)
+        if not blobs_id:
+            self.log("[ERRO] Falha ao criar a pasta de blobs no Google Drive")
+            return False
+        # Uma listagem serve para a deduplicação e para o cache de arquivos do upload
+        listing = service.list_all(f"'{blobs_id}' in parents and mimeType!='{FOLDER_MIME}' and trashed=false",
+                                   "id, name, md5Checksum, size")
+        service.seed_file_cache(blobs_id, listing)
+        blobs = {item['name']: item for item in listing}
+
+        # Reaproveita o hash do backup anterior quando tamanho e mtime não mudaram
+        base = self.previous_gdrive_backup(main_folder_id, backup_folder_id)
+        prev_files = self.previous_gdrive_files(base)
+        self.log(f"[BLOBS] {len(blobs)} conteúdos já armazenados no Google Drive")
+
+        entries, pending = [], {}
+        for path, rel, st in self.iter_steam_files(steam):
+            if not self.running:
+                self.log("[INFO] Backup do Google Drive interrompido durante a leitura dos arquivos")
+                return False
+            prev = prev_files.get(rel)
+            digest = None
+            # Hash reaproveitado só com tamanho e mtime exatamente iguais (como no snapshot local)
+            if prev and prev.get('hash') and prev.get('size') == st.st_size and prev.get('mtime_ns') == st.st_mtime_ns:
+                digest = prev['hash']
+            if digest not in blobs:
+                # Blob a enviar: SHA-256 (nome) e MD5 (conferência com o Drive) da mesma leitura
+                try:
+                    digest, md5 = VaultManifest.file_hashes(path)
+                except OSError as e:
+                    self.log(f"[ERRO] Falha: {rel} - {e}")
+                    continue
+                if digest not in blobs:
+                    pending.setdefault(digest, (path, md5))
+            entries.append((rel, st, digest))
+
+        self.log(f">>> ENVIANDO {len(pending)} BLOBS NOVOS ({len(entries)} arquivos no backup)...")
+        uploaded = service.upload_files(blobs_id, [(digest, path) for digest, (path, _) in pending.items()])
+        for digest, resource in uploaded.items():
+            if not (isinstance(resource, dict) and resource.get('id')):
+                continue
+            # O MD5 calculado pelo Drive precisa ser o do conteúdo que deu nome ao blob
+            if resource.get('md5Checksum') != pending[digest][1]:
+                self.log(f"[ERRO] Blob {digest[:12]} não confere com o conteúdo enviado "
+                         f"({pending[digest][0]} mudou durante o backup?); descartado")
+                try:
+                    service.delete_file(blobs_id, digest, resource['id'])
+                except Exception as e:
+                    self.log(f"[ERRO] Falha ao apagar o blob inválido {digest[:12]}: {service.describe_error(e)}")
+                continue
+            blobs[digest] = resource
+
+        if not self.running:
+            self.log("[INFO] Backup do Google Drive interrompido antes de gravar o manifesto")
+            return False
+
+        manifest = {'version': 1, 'layout': 'blobs', 'created': time.strftime("%Y-%m-%d %H:%M:%S"), 'files': {}}
+        for rel, st, digest in entries:
+            blob = blobs.get(digest)
+            if blob:
+                manifest['files'][rel] = {'id': blob['id'], 'hash': digest, 'size': st.st_size,
+                                          'mtime_ns': st.st_mtime_ns, 'md5': blob.get('md5Checksum')}
+        if not self.write_gdrive_manifest(backup_folder_id, manifest):
+            return False
+
+        failed = len(entries) - len(manifest['files'])
+        self.log(f"[BLOBS] {len(uploaded)} blobs enviados, {len(entries) - failed} arquivos no manifesto, {failed} falhas.")
+        if failed:
+            return False
+        self.log(f"[SUCESSO] Backup concluído no Google Drive (ID: {backup_folder_id})")
+        return True
+
+    def run_incremental_gdrive(self, steam, main_folder_id, backup_folder_id):
+        """Backup incremental: envia só o que mudou e referencia o restante no manifesto"""
+        service = self.gdrive_service
+        base = self.previous_gdrive_backup(main_folder_id, backup_folder_id)
+        prev_files = self.previous_gdrive_files(base)
+        if base:
+            self.log(f"[INCREMENTAL] Comparando com {base['name']} ({len(prev_files)} arquivos)")
+
+        manifest = {'version': 1, 'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+                    'base': base['name'] if base else None, 'files': {}}
+        changed = []
+        for path, rel, st in self.iter_steam_files(steam):
+            if not self.running:
+                break
+            prev = prev_files.get(rel)
+            unchanged = False
+            if prev and prev.get('size') == st.st_size:
+                # Tamanho e mtime exatamente iguais bastam (mesma árvore local, sem tolerância de FAT);
+                # senão compara o MD5 com o informado pelo Drive
+                if prev.get('mtime_ns') == st.st_mtime_ns:
+                    unchanged = True
+                elif prev.get('md5'):
+                    try:
+                        unchanged = VaultManifest.file_hash(path, algorithm='md5') == prev['md5']
+                    except OSError:
+                        pass
+            if unchanged:
+                manifest['files'][rel] = dict(prev, mtime_ns=st.st_mtime_ns)
+            else:
+                changed.append((rel, path, st))
+
+        self.log(f">>> ENVIANDO {len(changed)} ARQUIVOS ALTERADOS ({len(manifest['files'])} reaproveitados)...")
+        uploaded = service.upload_files(backup_folder_id, [(rel, path) for rel, path, _ in changed])
+        for rel, path, st in changed:
+            resource = uploaded.get(rel)
+            if isinstance(resource, dict) and resource.get('id'):
+                md5 = resource.get('md5Checksum') or VaultManifest.file_hash(path, algorithm='md5')
+                manifest['files'][rel] = {'id': resource['id'], 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'md5': md5}
+
+        if not self.running:
+            self.log("[INFO] Backup do Google Drive interrompido antes de gravar o manifesto")
+            return False
+
+        if not self.write_gdrive_manifest(backup_folder_id, manifest):
+            return False
+
+        failed = len(changed) - len(uploaded)
+        self.log(f"[INCREMENTAL] {len(uploaded)} enviados, {len(manifest['files']) - len(uploaded)} referenciados"
+                 f" do backup anterior, {failed} falhas.")
+        if failed:
+            return False
+        self.log(f"[SUCESSO] Backup concluído no Google Drive (ID: {backup_folder_id})")
+        return True
+
+    def log_restore_summary(self, results):
+        """Soma os contadores da restauração diferencial de todos os módulos"""
+        totals = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        for counts in results:
+            for key in totals:
+                totals[key] += (counts or {}).get(key, 0)
+        self.log(f"[DIFERENCIAL] Total: {totals['created']} criados, {totals['updated']} atualizados, "
+                 f"{totals['skipped']} inalterados, {totals['failed']} falhas.")
+        return totals
+
+    def report_api_stats(self, run):
+        """Resumo das métricas no log (CLI e GUI) e exportação em JSON se gdrive_stats_file estiver definido"""
+        self.api_stats.log_summary(self.log, run.upper())
+        path = self.config.get('gdrive_stats_file')
+        if path:
+            try:
+                self.api_stats.export(path, run=run)
+                self.log(f"[MÉTRICAS] Exportadas para {path}")
+            except OSError as e:
+                self.log(f"[AVISO] Falha ao exportar métricas: {e}")
+
+    def run_restore_gdrive(self, steam, backup_id, differential=False, staging=False):
+        """Restaura backup do Google Drive.
+
+        O backup no Drive tem o mesmo layout da pasta Steam: cada arquivo é baixado direto
+        para o seu lugar (temporário + rename atômico). staging=True mantém o fluxo antigo,
+        que baixa tudo para uma pasta temporária antes de copiar.
+        """
         if not self.gdrive_service:
             if not self.init_gdrive():
                 return False
+        self.api_stats.reset()
+        try:
+            return self.restore_from_gdrive(steam, backup_id, differential, staging)
+        finally:
+            self.report_api_stats("restore")
+
+    def restore_from_gdrive(self, steam, backup_id, differential=False, staging=False):
+        """Corpo da restauração do Google Drive (ver run_restore_gdrive)"""
         
         self.log("--- INICIANDO RESTAURAÇÃO DO GOOGLE DRIVE ---")
-        
+        if staging:
+            return self.run_restore_gdrive_staged(steam, backup_id, differential)
+
+        self.log(f">>> RESTAURANDO BACKUP {backup_id} DIRETO NA PASTA STEAM...")
+        service = self.gdrive_service
+        prefixes = tuple(rel_module.replace(os.sep, '/') + '/' for _, rel_module in VAULT_MODULES)
+
+        def restore_remote(rel, item):
+            dst = os.path.join(steam, *rel.split('/'))
+            existed = os.path.exists(dst)
+            started = time.perf_counter()
+            # Diferencial: o Drive informa o MD5, então arquivos iguais nem são baixados
+            if differential and existed and item.get('md5Checksum'):
+                try:
+                    if (os.path.getsize(dst) == int(item.get('size', -1)) and
+                            VaultManifest.file_hash(dst, algorithm='md5') == item['md5Checksum']):
+                        self.api_stats.record("file:skipped", time.perf_counter() - started)
+                        return 'skipped'
+                except OSError:
+                    pass
+            if not service.download_file(item['id'], dst):
+                self.api_stats.record("file:restore", time.perf_counter() - started, error=True)
+                return 'failed'
+            self.api_stats.record("file:restore", time.perf_counter() - started)
+            if rel in VAULT_DLLS:
+                self.log(f"[DLL] {rel} Restaurada.")
+            return 'updated' if existed else 'created'
+
+        try:
+            files = self.gdrive_backup_files(backup_id)
+            if files is None:
+                self.log("[ERRO] Restauração do Google Drive abortada: manifesto do backup ilegível")
+                return False
+            tasks = ((rel, item) for rel, item in files if rel.startswith(prefixes) or rel in VAULT_DLLS)
+            counts = run_bounded(tasks, restore_remote, {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0},
+                                 service.upload_jobs, lambda: self.running)
+            # Pacotes de arquivos pequenos (backup empacotado) são extraídos no lugar
+            bundles = [(item, steam, counts, differential) for rel, item in files
+                       if rel.startswith(GDRIVE_BUNDLE_FOLDER + '/') and rel.endswith('.svault')]
+            if bundles:
+                self.log(f">>> EXTRAINDO {len(bundles)} PACOTES DE ARQUIVOS PEQUENOS...")
+                bundle_counts = run_bounded(iter(bundles), self.restore_gdrive_bundle, {'done': 0, 'failed': 0},
+                                            service.upload_jobs, lambda: self.running)
+                counts['failed'] += bundle_counts['failed']
+        except Exception as e:
+            self.log(f"[ERRO] Falha ao restaurar do Google Drive: {e}")
+            return False
+
+        if not self.running:
+            self.log("[INFO] Restauração do Google Drive interrompida pelo usuário")
+            return False
+        if differential:
+            self.log_restore_summary([counts])
+        elif counts['failed']:
+            self.log(f"[AVISO] {counts['failed']} arquivos falharam na restauração.")
+        self.log("[SUCESSO] Restauração do Google Drive concluída")
+        return counts['failed'] == 0
+
+    def run_restore_gdrive_staged(self, steam, backup_id, differential=False):
+        """Restauração com staging: baixa o backup inteiro e depois copia para a pasta Steam"""
+
         # Cria pasta temporária para download (usando diretório com permissão)
         temp_dir = os.path.join(os.path.expanduser('~'), 'temp_gdrive_restore')
         self.safe_create_dir(temp_dir)
@@ -832,39 +3465,64 @@ class VaultEngine:
         try:
             # Faz download do backup do Google Drive
             self.log(f">>> BAIXANDO BACKUP {backup_id} DO GOOGLE DRIVE...")
-            if not self.gdrive_service.download_folder(backup_id, temp_dir):
+            files = self.gdrive_backup_files(backup_id)
+            if files is None:
+                self.log("[ERRO] Restauração do Google Drive abortada: manifesto do backup ilegível")
+                return False
+            if not self.gdrive_service.download_files(files, temp_dir):
                 self.log("[ERRO] Falha ao baixar backup do Google Drive")
                 return False
             
+            # Desempacota os pacotes de arquivos pequenos dentro da própria pasta temporária
+            bundle_dir = os.path.join(temp_dir, GDRIVE_BUNDLE_FOLDER)
+            if os.path.isdir(bundle_dir):
+                for name in sorted(os.listdir(bundle_dir)):
+                    if name.endswith('.svault'):
+                        for key, ok, error in VaultArchive(os.path.join(bundle_dir, name)).extract(temp_dir):
+                            if not ok:
+                                self.log(f"[ERRO] Falha: {key} - {error}")
+
             # Restaura os dados baixados
             self.log(">>> RESTAURANDO DADOS BAIXADOS...")
             
+            # Arquivos baixados não preservam o mtime: a comparação diferencial usa hash
+            diff = {'differential': differential, 'use_hash': True}
+            results = []
+
             # Copia USERDATA
             userdata_src = os.path.join(temp_dir, "userdata")
             if os.path.exists(userdata_src):
-                self.copy_module(userdata_src, os.path.join(steam, "userdata"), "RESTORE USERDATA")
+                results.append(self.copy_module(userdata_src, os.path.join(steam, "userdata"), "RESTORE USERDATA", **diff))
             
             # Copia STPLUG-IN
             stplugin_src = os.path.join(temp_dir, "config", "stplug-in")
             if os.path.exists(stplugin_src):
-                self.copy_module(stplugin_src, os.path.join(steam, "config", "stplug-in"), "RESTORE STPLUG-IN")
+                results.append(self.copy_module(stplugin_src, os.path.join(steam, "config", "stplug-in"), "RESTORE STPLUG-IN", **diff))
             
             # Copia DEPOTCACHE
             depotcache_src = os.path.join(temp_dir, "config", "depotcache")
             if os.path.exists(depotcache_src):
-                self.copy_module(depotcache_src, os.path.join(steam, "config", "depotcache"), "RESTORE DEPOTCACHE")
+                results.append(self.copy_module(depotcache_src, os.path.join(steam, "config", "depotcache"), "RESTORE DEPOTCACHE", **diff))
             
             # Copia STATS
             stats_src = os.path.join(temp_dir, "appcache", "stats")
             if os.path.exists(stats_src):
-                self.copy_module(stats_src, os.path.join(steam, "appcache", "stats"), "RESTORE STATS")
+                results.append(self.copy_module(stats_src, os.path.join(steam, "appcache", "stats"), "RESTORE STATS", **diff))
             
             # Copia DLLs
             for dll in ["version.dll", "winmm.dll"]:
                 dll_src = os.path.join(temp_dir, dll)
                 if os.path.exists(dll_src):
-                    if self.safe_copy(dll_src, os.path.join(steam, dll)):
+                    if differential:
+                        result = self.restore_file(dll_src, os.path.join(steam, dll), use_hash=True)
+                        results.append({result: 1})
+                        if result in ('created', 'updated'):
+                            self.log(f"[DLL] {dll} Restaurada.")
+                    elif self.safe_copy(dll_src, os.path.join(steam, dll)):
                         self.log(f"[DLL] {dll} Restaurada.")
+
+            if differential:
+                self.log_restore_summary(results)
             
             self.log("[SUCESSO] Restauração do Google Drive concluída")
             return True
@@ -876,9 +3534,14 @@ class VaultEngine:
             except:
                 pass
 
-    def run_restore(self, steam, backup_root):
+    def run_restore(self, steam, backup_root, archive=False, only=None, differential=False, use_hash=False, appids=None):
         vault_folder = os.path.join(backup_root, "SteamVault_Backup")
         origin = vault_folder
+
+        # Arquivo único (.svault): explícito ou quando é o único formato presente
+        archive_path = os.path.join(backup_root, ARCHIVE_FILE)
+        if archive or backup_root.endswith('.svault') or (not os.path.exists(vault_folder) and os.path.exists(archive_path)):
+            return self.run_archive_restore(steam, backup_root, only, differential)
         
         # Retrocompatibilidade
         if not os.path.exists(origin):
@@ -890,22 +3553,70 @@ class VaultEngine:
             origin = backup_root
 
         self.log("--- INICIANDO RESTAURAÇÃO DO COFRE ---")
-        
+        self.restore_vault(origin, steam, differential, use_hash, appids, only)
+
+    def restore_vault(self, origin, steam, differential=False, use_hash=False, appids=None, only=None):
+        """Restaura uma pasta no layout do cofre (userdata, config, appcache e DLLs)"""
         if not os.path.exists(os.path.join(origin, "userdata")):
             self.log("[ERRO CRÍTICO] O Cofre está vazio ou inválido (userdata missing).")
             return
 
-        self.copy_module(os.path.join(origin, "userdata"), os.path.join(steam, "userdata"), "RESTORE USERDATA")
-        self.copy_module(os.path.join(origin, "config", "stplug-in"), os.path.join(steam, "config", "stplug-in"), "RESTORE STPLUG-IN")
-        self.copy_module(os.path.join(origin, "config", "depotcache"), os.path.join(steam, "config", "depotcache"), "RESTORE DEPOTCACHE")
-        self.copy_module(os.path.join(origin, "appcache", "stats"), os.path.join(steam, "appcache", "stats"), "RESTORE STATS")
+        if appids and only:
+            self.log("[ERRO] Use --appid ou --only, não os dois na mesma restauração.")
+            return
+        if appids:
+            self.restore_appids(origin, steam, appids, differential, use_hash)
+            return
+        if only:
+            self.restore_selection(origin, steam, only, differential, use_hash)
+            return
+
+        diff = {'differential': differential, 'use_hash': use_hash}
+        results = [
+            self.copy_module(os.path.join(origin, "userdata"), os.path.join(steam, "userdata"), "RESTORE USERDATA", **diff),
+            self.copy_module(os.path.join(origin, "config", "stplug-in"), os.path.join(steam, "config", "stplug-in"), "RESTORE STPLUG-IN", **diff),
+            self.copy_module(os.path.join(origin, "config", "depotcache"), os.path.join(steam, "config", "depotcache"), "RESTORE DEPOTCACHE", **diff),
+            self.copy_module(os.path.join(origin, "appcache", "stats"), os.path.join(steam, "appcache", "stats"), "RESTORE STATS", **diff),
+        ]
 
         for dll in ["version.dll", "winmm.dll"]:
             src = os.path.join(origin, dll)
             if os.path.exists(src):
-                if self.safe_copy(src, os.path.join(steam, dll)):
+                if differential:
+                    result = self.restore_file(src, os.path.join(steam, dll), use_hash=use_hash)
+                    results.append({result: 1})
+                    if result in ('created', 'updated'):
+                        self.log(f"[DLL] {dll} Restaurada.")
+                elif self.safe_copy(src, os.path.join(steam, dll)):
                     self.log(f"[DLL] {dll} Restaurada.")
 
+        if differential:
+            self.log_restore_summary(results)
+
+    def restore_selection(self, origin, steam, only, differential=False, use_hash=False):
+        """--only na restauração de pasta: módulos, subpastas ou arquivos do cofre (caminhos relativos)"""
+        diff = {'differential': differential, 'use_hash': use_hash}
+        results = []
+        for rel in only:
+            rel = os.path.normpath(rel.replace('/', os.sep)).strip(os.sep)
+            if rel.startswith('..') or os.path.isabs(rel):
+                self.log(f"[ERRO] Caminho fora do cofre: {rel}")
+                continue
+            src, dst = os.path.join(origin, rel), os.path.join(steam, rel)
+            if os.path.isdir(src):
+                results.append(self.copy_module(src, dst, f"RESTORE {rel.upper()}", **diff))
+            elif os.path.isfile(src):
+                os.makedirs(os.path.dirname(dst) or steam, exist_ok=True)
+                if differential:
+                    results.append({self.restore_file(src, dst, use_hash=use_hash): 1})
+                elif self.safe_copy(src, dst):
+                    self.log(f"[INFO] {rel} restaurado.")
+            else:
+                self.log(f"[AVISO] {rel} não existe no cofre.")
+
+        if differential:
+            self.log_restore_summary(results)
+
 # --- MODO GUI (INTERFACE) ---
 if GUI_AVAILABLE:
     class VaultWorkerGUI(QThread):
@@ -925,6 +3636,7 @@ if GUI_AVAILABLE:
             self.log.emit(text)
 
         def run(self):
+            self.engine.apply_config(ConfigManager.load())
             if self.gdrive_mode:
                 if self.mode == "backup":
                     # Verifica se o backup foi interrompido antes de iniciar
@@ -932,17 +3644,39 @@ if GUI_AVAILABLE:
                         self.log.emit("[INFO] Backup interrompido antes de iniciar")
                         self.finished.emit()
                         return
-                    self.engine.run_backup_gdrive(self.steam)
+                    self.engine.run_backup_gdrive(self.steam, incremental=self.engine.config.get('gdrive_incremental', False),
+                                                  pack=self.engine.config.get('gdrive_pack_small_files', False),
+                                                  blob_store=self.engine.config.get('gdrive_blob_store', False))
                 elif self.mode == "auth_only":
                     # Apenas autenticação, não faz backup
                     self.engine.test_gdrive_connection()
                 else:  # restore
-                    self.engine.run_restore_gdrive(self.steam, self.backup_id)
+                    self.engine.run_restore_gdrive(self.steam, self.backup_id,
+                                                   differential=self.engine.config.get('differential_restore', False),
+                                                   staging=self.engine.config.get('gdrive_restore_staging', False))
             else:
                 if self.mode == "backup":
-                    self.engine.run_backup(self.steam, self.backup)
+                    config = self.engine.config
+                    if config.get('backup_mode') == "snapshot" and config.get('link_snapshots'):
+                        self.engine.run_link_snapshot(self.steam, self.backup, config.get('snapshot_keep'))
+                    elif config.get('backup_mode') == "snapshot":
+                        self.engine.run_snapshot_backup(self.steam, self.backup, config.get('snapshot_keep'))
+                    else:
+                        self.engine.run_backup(self.steam, self.backup,
+                                               incremental=config.get('incremental_backup', False),
+                                               use_hash=config.get('manifest_hash', False),
+                                               archive=config.get('archive_backup', False),
+                                               codec=config.get('archive_codec', "zlib"))
                 else:
-                    self.engine.run_restore(self.steam, self.backup)
+                    config = self.engine.config
+                    if config.get('backup_mode') == "snapshot":
+                        self.engine.run_snapshot_restore(self.steam, self.backup,
+                                                         differential=config.get('differential_restore', False),
+                                                         use_hash=config.get('restore_hash', False))
+                    else:
+                        self.engine.run_restore(self.steam, self.backup, archive=config.get('archive_backup', False),
+                                                differential=config.get('differential_restore', False),
+                                                use_hash=config.get('restore_hash', False))
             self.finished.emit()
 
     class SteamVaultGUI(QMainWindow):
@@ -1385,9 +4119,11 @@ if GUI_AVAILABLE:
                 return
             
             # Check Segurança (Overwrite) para backup local
-            if mode == "backup" and not gdrive_mode:
+            if mode == "backup" and not gdrive_mode and not self.config.get('incremental_backup') and self.config.get('backup_mode') != "snapshot":
                 tgt = os.path.join(self.config['backup_path'], "SteamVault_Backup")
-                if os.path.exists(tgt) and os.listdir(tgt):
+                if self.config.get('archive_backup'):
+                    tgt = os.path.join(self.config['backup_path'], ARCHIVE_FILE)
+                if os.path.exists(tgt) and (os.path.isfile(tgt) or os.listdir(tgt)):
                     msg = QMessageBox(self)
                     msg.setWindowTitle("Cofre Ocupado")
                     msg.setText("Já existe um backup anterior.\nDeseja sobrescrever o cofre?")
@@ -1461,6 +4197,188 @@ if GUI_AVAILABLE:
             if self.old_pos: 
                 d = e.globalPosition().toPoint() - self.old_pos; self.move(self.x()+d.x(), self.y()+d.y()); self.old_pos = e.globalPosition().toPoint()
 
+# --- BENCHMARK (ÁRVORE STEAM SINTÉTICA) ---
+BENCH_OUTPUT_FILE = "vault_benchmark.json"
+BENCH_MARKER_FILE = ".steamvault_bench"  # marca um --bench-dir criado pelo benchmark (pode ser limpo)
+
+def generate_synthetic_steam(root, accounts=3, appids=50, saves_per_app=40, save_size=2048,
+                             depot_size=256 * 1024, stats_size=8 * 1024, seed=1234):
+    """Gera um diretório Steam realista: várias contas e AppIDs, muitos saves pequenos,
+    manifests do depotcache, .bin de stats e version.dll/winmm.dll. Retorna (arquivos, bytes)."""
+    rng = random.Random(seed)
+    files = total = 0
+
+    def write(path, size):
+        nonlocal files, total
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(rng.randbytes(size) if hasattr(rng, 'randbytes') else os.urandom(size))
+        files += 1
+        total += size
+
+    app_ids = [str(10 + i * 10) for i in range(appids)]
+    account_ids = [str(10000000 + i) for i in range(accounts)]
+    for account in account_ids:
+        for appid in app_ids:
+            for i in range(saves_per_app):
+                # Tamanhos variados em torno de save_size (a maioria bem pequena)
+                size = max(16, int(rng.expovariate(1.0 / save_size)))
+                write(os.path.join(root, "userdata", account, appid, "remote", f"save_{i:04d}.sav"), size)
+            write(os.path.join(root, "userdata", account, appid, "remotecache.vdf"), 512)
+        write(os.path.join(root, "userdata", account, "config", "localconfig.vdf"), 32 * 1024)
+
+    for appid in app_ids:
+        depot = str(int(appid) + 1)
+        manifest_id = str(rng.randrange(10**18, 10**19))
+        lua = os.path.join(root, "config", "stplug-in", f"{appid}.lua")
+        os.makedirs(os.path.dirname(lua), exist_ok=True)
+        with open(lua, 'w', encoding='utf-8') as f:
+            f.write(f'addappid({appid})\naddappid({depot},1,"{rng.getrandbits(128):032x}")\nsetManifestid({depot},"{manifest_id}")\n')
+        files += 1
+        total += os.path.getsize(lua)
+        write(os.path.join(root, "config", "depotcache", f"{depot}_{manifest_id}.manifest"), depot_size)
+        write(os.path.join(root, "appcache", "stats", f"UserGameStatsSchema_{appid}.bin"), stats_size)
+        for account in account_ids:
+            write(os.path.join(root, "appcache", "stats", f"UserGameStats_{account}_{appid}.bin"), stats_size // 4)
+
+    for dll in VAULT_DLLS:
+        write(os.path.join(root, dll), 512 * 1024)
+    return files, total
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB) desde o início, ou None se indisponível.
+
+    ru_maxrss nunca diminui: após cada cenário vale o máximo acumulado do processo
+    (inclui a geração da árvore e os cenários anteriores), não o pico daquele cenário.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB; macOS em bytes
+        return round(peak / (1048576 if sys.platform == 'darwin' else 1024), 1)
+    except (ImportError, OSError):
+        return None
+
+def run_benchmark(args):
+    """Gera uma árvore sintética, cronometra backup/restauração e grava os resultados em JSON"""
+    if args.bench_dir:
+        # O benchmark apaga as subpastas do diretório de trabalho: só aceita um diretório
+        # vazio ou criado por ele mesmo (com o arquivo marcador)
+        work = os.path.abspath(args.bench_dir)
+        marker = os.path.join(work, BENCH_MARKER_FILE)
+        if os.path.isdir(work) and os.listdir(work) and not os.path.isfile(marker):
+            print(f"[ERRO] {work} não está vazio e não foi criado pelo benchmark; use um diretório novo.")
+            return None
+        os.makedirs(work, exist_ok=True)
+        open(marker, 'a').close()
+    else:
+        work = tempfile.mkdtemp(prefix="steamvault_bench_")
+    steam = os.path.join(work, "steam")
+    backup = os.path.join(work, "backup")
+    errors = []
+
+    def quiet_log(text):
+        if "[ERRO" in text:
+            errors.append(text)
+            print(text)
+
+    try:
+        shutil.rmtree(steam, ignore_errors=True)
+        shutil.rmtree(backup, ignore_errors=True)
+        os.makedirs(backup)
+        print(f"[BENCH] Gerando árvore sintética em {steam}...")
+        files, total = generate_synthetic_steam(steam, args.bench_accounts, args.bench_appids,
+                                                args.bench_saves, args.bench_save_size)
+        print(f"[BENCH] {files} arquivos, {total / 1048576:.1f} MB.")
+
+        engine = VaultEngine(quiet_log)
+        engine.jobs = args.jobs or DEFAULT_CONFIG['copy_jobs']
+        restore_dir = os.path.join(work, "restore")
+        scenarios = [
+            ("backup_full", lambda: engine.run_backup(steam, backup)),
+            ("backup_incremental", lambda: engine.run_backup(steam, backup, incremental=True)),
+            ("restore_full", lambda: engine.run_restore(restore_dir, backup)),
+            ("restore_differential", lambda: engine.run_restore(restore_dir, backup, differential=True)),
+            ("snapshot_first", lambda: engine.run_snapshot_backup(steam, backup)),
+            ("snapshot_second", lambda: engine.run_snapshot_backup(steam, backup)),
+            ("link_snapshot", lambda: engine.run_link_snapshot(steam, backup)),
+            ("archive_backup", lambda: engine.run_archive_backup(steam, backup, args.codec or "zlib")),
+            ("archive_restore", lambda: engine.run_archive_restore(os.path.join(work, "restore_archive"), backup)),
+        ]
+
+        # Cenários do Google Drive contra o backend offline (latência e erros injetados)
+        drive = None
+        if GOOGLE_DRIVE_AVAILABLE:
+            drive = OfflineDrive(latency=args.bench_gdrive_latency / 1000, error_rate=args.bench_gdrive_errors, seed=1,
+                                 commit_error_rate=args.bench_gdrive_commit_errors)
+            cloud = VaultEngine(quiet_log)
+            cloud.gdrive_backend = drive
+            cloud.apply_config({'gdrive_jobs': args.jobs or DEFAULT_CONFIG['gdrive_jobs'], 'gdrive_requests_per_second': 0})
+            cloud.init_gdrive()
+            cloud.gdrive_service.upload_journal = UploadJournal(os.path.join(work, GDRIVE_SESSION_FILE))
+            gdrive_restore = os.path.join(work, "restore_gdrive")
+            latest = lambda: cloud.gdrive_service.list_backups()[0]['id']
+            scenarios += [
+                ("gdrive_backup", lambda: cloud.run_backup_gdrive(steam)),
+                ("gdrive_backup_incremental", lambda: cloud.run_backup_gdrive(steam, incremental=True)),
+                ("gdrive_backup_packed", lambda: cloud.run_backup_gdrive(steam, pack=True)),
+                ("gdrive_backup_blobs", lambda: cloud.run_backup_gdrive(steam, blob_store=True)),
+                ("gdrive_restore", lambda: cloud.run_restore_gdrive(gdrive_restore, latest())),
+                ("gdrive_restore_differential", lambda: cloud.run_restore_gdrive(gdrive_restore, latest(), differential=True)),
+            ]
+        selected = set(args.bench_scenarios) if args.bench_scenarios else None
+
+        results = []
+        for name, scenario in scenarios:
+            if selected and name not in selected:
+                continue
+            before = drive.stats() if drive and name.startswith("gdrive") else None
+            started = time.perf_counter()
+            scenario()
+            elapsed = time.perf_counter() - started
+            result = {
+                'scenario': name,
+                'files': files,
+                'bytes': total,
+                'seconds': round(elapsed, 4),
+                'files_per_s': round(files / elapsed, 1) if elapsed else None,
+                'mb_per_s': round(total / 1048576 / elapsed, 2) if elapsed else None,
+                'process_peak_rss_mb': peak_rss_mb()
+            }
+            if before is not None:
+                after = drive.stats()
+                result['gdrive_requests'] = after['requests'] - before['requests']
+                result['gdrive_calls'] = {kind: count - before['calls'].get(kind, 0)
+                                          for kind, count in after['calls'].items() if count - before['calls'].get(kind, 0)}
+                result['gdrive_operations'] = cloud.api_stats.summary()
+            results.append(result)
+            requests_info = f"  {result['gdrive_requests']:>7} req" if before is not None else ""
+            print(f"[BENCH] {name:<28} {elapsed:8.3f}s  {result['files_per_s']:>10} arq/s  {result['mb_per_s']:>8} MB/s{requests_info}")
+
+        report = {
+            'app': APP_NAME,
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {
+                'accounts': args.bench_accounts, 'appids': args.bench_appids,
+                'saves_per_app': args.bench_saves, 'save_size': args.bench_save_size,
+                'jobs': engine.jobs,
+                'gdrive_latency_ms': args.bench_gdrive_latency, 'gdrive_error_rate': args.bench_gdrive_errors,
+                'gdrive_commit_error_rate': args.bench_gdrive_commit_errors
+            },
+            'errors': len(errors),
+            'results': results
+        }
+        output = args.bench_output or BENCH_OUTPUT_FILE
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Resultados gravados em {output}")
+        return report
+    finally:
+        if not args.bench_dir:
+            shutil.rmtree(work, ignore_errors=True)
+
 # --- MODO CLI ---
 def run_cli(args):
     config = ConfigManager.load()
@@ -1476,24 +4394,87 @@ def run_cli(args):
         return
 
     engine = VaultEngine(print)
+    engine.apply_config(config)
+    if args.jobs: engine.jobs = args.jobs
+
+    if args.action == "snapshots":
+        store = SnapshotStore(os.path.join(backup, SNAPSHOT_FOLDER))
+        names = store.list_snapshots()
+        if not names and not store.list_trees():
+            print("[INFO] Nenhum snapshot encontrado.")
+        for name in names:
+            print(f"  {name} ({len(store.load(name)['files'])} arquivos)")
+        for name in store.list_trees():
+            print(f"  {name} (árvore com hardlinks)")
+        return
+
+    if args.action == "appids":
+        vault_folder = os.path.join(backup, "SteamVault_Backup")
+        index = AppIdIndex.load(vault_folder) or AppIdIndex.from_keys(
+            (key for _, key, _ in engine.iter_steam_files(steam)), steam)
+        for appid in sorted(index.appids, key=int):
+            print(f"  {appid}: {len(index.appids[appid])} arquivos")
+        return
 
-    if args.action == "backup":
-        tgt = os.path.join(backup, "SteamVault_Backup")
-        if os.path.exists(tgt) and os.listdir(tgt) and not args.force:
+    snapshot_mode = args.snapshot is not None or args.link or config.get('backup_mode') == "snapshot"
+    if args.action == "backup" and snapshot_mode:
+        keep = args.keep if args.keep is not None else config.get('snapshot_keep')
+        if args.link or config.get('link_snapshots'):
+            engine.run_link_snapshot(steam, backup, keep)
+        else:
+            engine.run_snapshot_backup(steam, backup, keep)
+    elif args.action == "backup":
+        incremental = args.incremental or config.get('incremental_backup', False)
+        use_hash = args.hash or config.get('manifest_hash', False)
+        archive = args.archive or config.get('archive_backup', False)
+        tgt = os.path.join(backup, ARCHIVE_FILE if archive else "SteamVault_Backup")
+        if os.path.exists(tgt) and (os.path.isfile(tgt) or os.listdir(tgt)) and not args.force and not incremental:
             if input("Sobrescrever Cofre? [S/N]: ").upper() != 'S': return
-        engine.run_backup(steam, backup)
+        engine.run_backup(steam, backup, incremental=incremental, use_hash=use_hash,
+                          archive=archive, codec=args.codec or config.get('archive_codec', "zlib"),
+                          appids=args.appid)
+    elif args.action == "restore" and snapshot_mode:
+        engine.run_snapshot_restore(steam, backup, args.snapshot,
+                                    differential=args.differential or config.get('differential_restore', False),
+                                    use_hash=args.hash or config.get('restore_hash', False))
     elif args.action == "restore":
-        engine.run_restore(steam, backup)
+        only = [dict(VAULT_MODULES).get(o.upper(), o) for o in args.only] if args.only else None
+        engine.run_restore(steam, backup, archive=args.archive or config.get('archive_backup', False), only=only,
+                           differential=args.differential or config.get('differential_restore', False),
+                           use_hash=args.hash or config.get('restore_hash', False),
+                           appids=args.appid)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description=f"{APP_NAME} Tool")
-    parser.add_argument("action", nargs="?", choices=["backup", "restore"])
+    parser.add_argument("action", nargs="?", choices=["backup", "restore", "snapshots", "appids", "benchmark"])
     parser.add_argument("--steam", help="Caminho Steam")
     parser.add_argument("--backup-path", help="Caminho Backup")
     parser.add_argument("--force", action="store_true")
+    parser.add_argument("--incremental", action="store_true", help="Copia apenas arquivos novos ou alterados (manifesto)")
+    parser.add_argument("--hash", action="store_true", help="Inclui hash SHA-256 no manifesto incremental / compara conteúdo na restauração diferencial")
+    parser.add_argument("--differential", action="store_true", help="Restaura apenas arquivos ausentes ou diferentes")
+    parser.add_argument("--jobs", type=int, help="Número de cópias simultâneas (padrão: copy_jobs da config)")
+    parser.add_argument("--snapshot", nargs="?", const="latest", help="Usa snapshots versionados (na restauração: nome do snapshot, padrão latest)")
+    parser.add_argument("--link", action="store_true", help="Snapshot em árvore com hardlinks/reflink (mesmo sistema de arquivos)")
+    parser.add_argument("--keep", type=int, help="Quantidade de snapshots mantidos (padrão: snapshot_keep da config)")
+    parser.add_argument("--archive", action="store_true", help=f"Usa o formato de arquivo único ({ARCHIVE_FILE})")
+    parser.add_argument("--codec", choices=list(VaultArchive.CODECS), help="Compressão do arquivo único (padrão: archive_codec da config)")
+    parser.add_argument("--appid", nargs="+", help="Backup/restauração apenas destes jogos (AppIDs)")
+    parser.add_argument("--only", nargs="+", help="Restaura apenas módulos (USERDATA, STATS...), subpastas ou arquivos do cofre")
+    parser.add_argument("--bench-accounts", type=int, default=3, help="Benchmark: contas em userdata")
+    parser.add_argument("--bench-appids", type=int, default=50, help="Benchmark: quantidade de AppIDs")
+    parser.add_argument("--bench-saves", type=int, default=40, help="Benchmark: saves por AppID e conta")
+    parser.add_argument("--bench-save-size", type=int, default=2048, help="Benchmark: tamanho médio dos saves (bytes)")
+    parser.add_argument("--bench-scenarios", nargs="+", help="Benchmark: cenários a executar (padrão: todos)")
+    parser.add_argument("--bench-dir", help="Benchmark: diretório de trabalho (vazio ou de um benchmark anterior) mantido após a execução")
+    parser.add_argument("--bench-gdrive-latency", type=float, default=0.0, help="Benchmark: latência simulada por requisição do Drive offline (ms)")
+    parser.add_argument("--bench-gdrive-errors", type=float, default=0.0, help="Benchmark: taxa de erros 503 injetados no Drive offline (0 a 1)")
+    parser.add_argument("--bench-gdrive-commit-errors", type=float, default=0.0, help="Benchmark: taxa de respostas perdidas após a operação ser aplicada no Drive offline (0 a 1)")
+    parser.add_argument("--bench-output", help=f"Benchmark: arquivo JSON de resultados (padrão: {BENCH_OUTPUT_FILE})")
     args = parser.parse_args()
 
-    if args.action: run_cli(args)
+    if args.action == "benchmark": run_benchmark(args)
+    elif args.action: run_cli(args)
     elif GUI_AVAILABLE:
         app = QApplication(sys.argv)
         w = SteamVaultGUI()
@@ -0,0 +1,241 @@
+"""Testes do cliente do Google Drive contra o OfflineDrive (sem rede)."""
+import importlib.util
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+import httplib2
+from googleapiclient.errors import HttpError
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_spec = importlib.util.spec_from_file_location("steam_vault", Path(__file__).resolve().parent.parent / "STEAM VAULT.py")
+sv = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sv)
+
+
+def backend_error():
+    return HttpError(httplib2.Response({'status': 503}), b'{"error": {"message": "Backend Error (teste)"}}')
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(sv, "GDRIVE_BACKOFF_BASE", 0.0)
+
+
+def make_engine(tmp_path, **drive_options):
+    drive = sv.OfflineDrive(seed=1, **drive_options)
+    engine = sv.VaultEngine(lambda message: None)
+    engine.gdrive_backend = drive
+    engine.apply_config({'gdrive_requests_per_second': 0, 'gdrive_max_retries': 8})
+    assert engine.init_gdrive()
+    engine.gdrive_service.upload_journal = sv.UploadJournal(str(tmp_path / "journal.json"))
+    return engine, drive
+
+
+def make_steam(root):
+    for app in ("10", "730"):
+        remote = root / "userdata" / "111" / app / "remote"
+        remote.mkdir(parents=True)
+        for i in range(3):
+            (remote / f"save{i}.sav").write_bytes(os.urandom(200 + i))
+    stats = root / "appcache" / "stats"
+    stats.mkdir(parents=True)
+    (stats / "UserGameStats_111_730.bin").write_bytes(b"x" * 50)
+    return root
+
+
+def tree(root):
+    return {path.relative_to(root).as_posix(): path.read_bytes() for path in root.rglob("*") if path.is_file()}
+
+
+class FlakyBatches:
+    """Envolve os batches do drive: falha a requisição inteira ou itens, na primeira vez"""
+
+    def __init__(self, drive, whole=0, items=()):
+        self.create = drive.new_batch_http_request
+        self.whole = whole
+        self.items = set(items)
+        drive.new_batch_http_request = self.new_batch
+
+    def new_batch(self, callback=None):
+        def flaky_callback(request_id, response, exception):
+            if request_id in self.items:
+                self.items.discard(request_id)
+                response, exception = None, backend_error()
+            callback(request_id, response, exception)
+
+        batch = self.create(callback=flaky_callback)
+        execute = batch.execute
+
+        def flaky_execute():
+            if self.whole:
+                self.whole -= 1
+                raise backend_error()
+            return execute()
+        batch.execute = flaky_execute
+        return batch
+
+
+def list_requests(names):
+    return [(name, lambda service, name=name: service.files().list(q=f"name='{name}'", fields="files(id)"))
+            for name in names]
+
+
+def test_quote_escapes_backslash_and_quote():
+    assert sv.GoogleDriveService.quote("it's") == "it\\'s"
+    assert sv.GoogleDriveService.quote("a\\b") == "a\\\\b"
+
+
+def test_folder_names_with_quote_and_backslash(tmp_path):
+    engine, _ = make_engine(tmp_path)
+    service = engine.gdrive_service
+    name = "it's a \\ folder"
+    folder_id = service.create_folder(name)
+    service.folder_cache.clear()
+    assert service.find_folder(name) == folder_id
+    assert service.find_folder("it's a folder") is None
+
+
+def test_execute_batch_retries_whole_batch_failure(tmp_path):
+    engine, drive = make_engine(tmp_path)
+    flaky = FlakyBatches(drive, whole=1)
+    keys = ["a", "b", "c"]
+    results, errors = engine.gdrive_service.execute_batch(list_requests(keys), recover=lambda pending: {})
+    assert sorted(results) == keys
+    assert errors == {}
+    assert flaky.whole == 0
+
+
+def test_execute_batch_retries_failed_items(tmp_path):
+    engine, drive = make_engine(tmp_path)
+    flaky = FlakyBatches(drive, items=["b"])
+    results, errors = engine.gdrive_service.execute_batch(list_requests(["a", "b", "c"]))
+    assert sorted(results) == ["a", "b", "c"]
+    assert errors == {}
+    assert not flaky.items
+    assert drive.stats()['calls']['batch'] == 2
+
+
+def test_upload_file_creates_skips_and_updates(tmp_path):
+    engine, drive = make_engine(tmp_path)
+    service = engine.gdrive_service
+    folder_id = service.create_folder("uploads")
+    local = tmp_path / "save.sav"
+    local.write_bytes(b"first")
+
+    created = service.upload_file(str(local), folder_id)
+    assert created['id'] and drive.data[created['id']] == b"first"
+    assert drive.stats()['calls'].get('create', 0) == 2  # pasta + arquivo
+
+    skipped = service.upload_file(str(local), folder_id)
+    assert skipped['id'] == created['id']
+    assert drive.stats()['calls'].get('update', 0) == 0
+
+    local.write_bytes(b"second version")
+    updated = service.upload_file(str(local), folder_id)
+    assert updated['id'] == created['id']
+    assert drive.data[created['id']] == b"second version"
+    assert drive.stats()['calls']['update'] == 1
+    assert drive.stats()['calls']['create'] == 2
+
+
+def test_restore_fails_when_manifest_is_unreadable(tmp_path):
+    engine, drive = make_engine(tmp_path)
+    steam = make_steam(tmp_path / "steam")
+    assert engine.run_backup_gdrive(str(steam), incremental=True)
+    backup_id = engine.gdrive_service.list_backups()[0]['id']
+    manifest_id = next(file_id for file_id, item in drive.items.items() if item['name'] == sv.GDRIVE_MANIFEST_FILE)
+    drive.data[manifest_id] = b"{ corrompido"
+    assert engine.run_restore_gdrive(str(tmp_path / "restore"), backup_id) is False
+
+
+def test_backup_round_trip_without_duplicates_under_lost_responses(tmp_path):
+    engine, drive = make_engine(tmp_path, commit_error_rate=0.2)
+    steam = make_steam(tmp_path / "steam")
+    assert engine.run_backup_gdrive(str(steam))
+    assert sum(op['errors'] for op in engine.api_stats.summary().values()) > 0
+
+    names = {}
+    for item in drive.items.values():
+        key = (tuple(item['parents']), item['name'])
+        names[key] = names.get(key, 0) + 1
+    assert [key for key, count in names.items() if count > 1] == []
+
+    backup_id = engine.gdrive_service.list_backups()[0]['id']
+    restore = tmp_path / "restore"
+    assert engine.run_restore_gdrive(str(restore), backup_id)
+    assert tree(restore) == tree(steam)
+
+
+def rewrite_same_size(path, content, delay_ns=10**9):
+    """Troca o conteúdo mantendo o tamanho, com mtime só delay_ns depois do anterior"""
+    st = path.stat()
+    path.write_bytes(content)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + delay_ns))
+
+
+def test_incremental_backup_uploads_same_size_change_within_two_seconds(tmp_path):
+    engine, _ = make_engine(tmp_path)
+    steam = make_steam(tmp_path / "steam")
+    assert engine.run_backup_gdrive(str(steam), incremental=True)
+    rewrite_same_size(steam / "appcache" / "stats" / "UserGameStats_111_730.bin", b"y" * 50)
+    assert engine.run_backup_gdrive(str(steam), incremental=True)
+
+    backup_id = engine.gdrive_service.list_backups()[0]['id']
+    restore = tmp_path / "restore"
+    assert engine.run_restore_gdrive(str(restore), backup_id)
+    assert tree(restore) == tree(steam)
+
+
+def test_blob_backup_uploads_same_size_change_within_two_seconds(tmp_path):
+    engine, _ = make_engine(tmp_path)
+    steam = make_steam(tmp_path / "steam")
+    assert engine.run_backup_gdrive(str(steam), blob_store=True)
+    rewrite_same_size(steam / "appcache" / "stats" / "UserGameStats_111_730.bin", b"y" * 50)
+    assert engine.run_backup_gdrive(str(steam), blob_store=True)
+
+    backup_id = engine.gdrive_service.list_backups()[0]['id']
+    restore = tmp_path / "restore"
+    assert engine.run_restore_gdrive(str(restore), backup_id)
+    assert tree(restore) == tree(steam)
+
+
+def test_interrupted_upload_resumes_into_the_new_backup(tmp_path):
+    engine, drive = make_engine(tmp_path)
+    service = engine.gdrive_service
+    service.upload_chunk_size = service.multipart_threshold = 256 * 1024
+    steam = make_steam(tmp_path / "steam")
+    big = steam / "userdata" / "111" / "730" / "remote" / "big.bin"
+    big.write_bytes(os.urandom(1024 * 1024 + 5))
+
+    # Para o backup depois de dois blocos enviados
+    request = drive.request
+
+    def stop_after_two_chunks(kind):
+        request(kind)
+        if kind == 'upload_chunk' and drive.calls[kind] == 2:
+            engine.running = False
+    drive.request = stop_after_two_chunks
+    engine.run_backup_gdrive(str(steam))
+    drive.request = request
+    assert str(big) in service.upload_journal._load()
+
+    time.sleep(1.1)  # nova pasta backup_<timestamp>
+    engine.running = True
+    chunks = drive.calls['upload_chunk']
+    assert engine.run_backup_gdrive(str(steam))
+    assert drive.calls['upload_chunk'] - chunks == 3  # só os blocos restantes
+    assert service.upload_journal._load() == {}
+
+    uploads = [item for item in drive.items.values() if item['name'] == "big.bin"]
+    assert len(uploads) == 1
+    assert len(uploads[0]['parents']) == 1
+    assert drive.data[uploads[0]['id']] == big.read_bytes()
+
+    backup_id = service.list_backups()[0]['id']
+    restore = tmp_path / "restore"
+    assert engine.run_restore_gdrive(str(restore), backup_id)
+    assert tree(restore) == tree(steam)